@@ -4,28 +4,62 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN
-from .coordinator import EngieDataCoordinator
+from .coordinator import EngieDataCoordinator, async_remove_stored_data
+from .scheduler import async_get_scheduler, async_unschedule
+from .transport import async_acquire_transport, async_release_transport
 
 PLATFORMS: list[str] = ["sensor"]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    coord = EngieDataCoordinator(hass, entry)
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coord
-    await coord.async_config_entry_first_refresh()
-
-    profile = (coord.data or {}).get("profile") or {}
-    email = (profile.get("email") or entry.data.get("username") or "").strip()
-    if email:
-        desired_title = f"Engie România - {email}"
-        if entry.title != desired_title:
-            hass.config_entries.async_update_entry(entry, title=desired_title)
-
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    transport = await async_acquire_transport(hass)
+    coord: EngieDataCoordinator | None = None
+    try:
+        coord = EngieDataCoordinator(hass, entry, transport)
+        # Pornire rapidă: entitățile se creează din ultimul snapshot, iar refresh-ul
+        # de rețea rulează în fundal; fără snapshot, așteptăm primul refresh
+        restored = await coord.async_restore_snapshot()
+        if not restored:
+            await coord.async_config_entry_first_refresh()
+        hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coord
+
+        email = (
+            (coord.data.profile.email if coord.data else None) or entry.data.get("username") or ""
+        ).strip()
+        if email:
+            desired_title = f"Engie România - {email}"
+            if entry.title != desired_title:
+                hass.config_entries.async_update_entry(entry, title=desired_title)
+
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        async_get_scheduler(hass).add(entry, coord)
+        coord.start_token_renewal()
+    except Exception:
+        # Setup eșuat (inclusiv ConfigEntryNotReady): nu lăsăm în urmă limita de
+        # rată a intrării, task-uri sau o referință la transportul partajat
+        async_unschedule(hass, entry.entry_id)
+        hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        if coord is not None:
+            await coord.async_close()
+        await async_release_transport(hass)
+        raise
+    if restored:
+        entry.async_create_background_task(
+            hass, coord.async_refresh(), f"{DOMAIN}_refresh_{entry.entry_id}"
+        )
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+    if unload_ok:
+        async_unschedule(hass, entry.entry_id)
+        coord = hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        if coord is not None:
+            await coord.async_close()
+        await async_release_transport(hass)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await async_remove_stored_data(hass, entry.entry_id)
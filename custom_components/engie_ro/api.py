@@ -1,10 +1,37 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 from typing import Any
 from urllib.parse import quote_plus
 
 import aiohttp
 
+from .const import (
+    BREAKER_COOLDOWN_SEC,
+    BREAKER_THRESHOLD,
+    DEFAULT_RATE_LIMIT_BURST,
+    DEFAULT_RATE_LIMIT_RPS,
+    HTTP_TIMEOUT_SEC,
+    INVOICES_BATCH_DISABLE_AFTER,
+    INVOICES_BATCH_REPROBE_SEC,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_SEC,
+    RETRY_MAX_SEC,
+)
+from .metrics import ApiMetrics, EndpointMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
 
 class EngieHTTPError(RuntimeError): ...
 
@@ -12,13 +39,320 @@ class EngieHTTPError(RuntimeError): ...
 class EngieUnauthorized(EngieHTTPError): ...
 
 
+class EngieDeadlineExceeded(EngieHTTPError): ...
+
+
+class EngieCircuitOpen(EngieHTTPError): ...
+
+
+class EngieNotSupported(EngieHTTPError):
+    """Gateway-ul nu expune endpoint-ul (404/405)."""
+
+
+class EngieAuthRejected(EngieHTTPError):
+    """Credențialele sau refresh token-ul au fost respinse (400/401/403)."""
+
+
+class EngieRetryableError(EngieHTTPError):
+    """Eroare trecătoare (429, 5xx, timeout, conexiune) care merită reîncercată."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+# Termenul limită (time.monotonic) al refresh-ului curent; moștenit de task-urile copil
+_deadline: ContextVar[float | None] = ContextVar("engie_ro_deadline", default=None)
+
+# Sub acest timp rămas nu mai pornim cereri noi: nu ar apuca să se termine
+_MIN_REQUEST_SEC = 1.0
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[float]:
+    """Limitează toate cererile `EngieClient` din acest context la `seconds` de acum.
+
+    Un termen deja activ (mai apropiat) nu este prelungit.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def deadline_remaining() -> float | None:
+    """Secundele rămase până la termenul curent, sau None dacă nu există unul."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+# Reînnoirea token-ului de acces cu refresh token-ul primit la login
+REFRESH_TOKEN_PATH = "/v1/refresh_token"
+
+# Variantele de formular încercate pentru endpoint-urile care primesc contul contract
+_CONTRACT_ACCOUNT_KEYS = ("contract_account[]", "contract_account")
+# Cum se cer mai multe conturi: un POST batch sau, după eșecuri repetate, individual
+_BATCH_VARIANTS = ("batch", "single")
+
+
+class FormVariantCache:
+    """Ține minte ce variantă de formular acceptă fiecare endpoint.
+
+    Varianta reținută este încercată prima; celelalte sunt încercate doar dacă
+    ea eșuează. O variantă reținută cu `ttl` este uitată după expirare (epoch în
+    `expires`). `on_change` este apelat când se învață o variantă nouă, ca să
+    poată fi persistată.
+    """
+
+    def __init__(
+        self,
+        variants: dict[str, str] | None = None,
+        expires: dict[str, float] | None = None,
+    ) -> None:
+        self._variants: dict[str, str] = dict(variants or {})
+        self._expires: dict[str, float] = dict(expires or {})
+        self.on_change: Callable[[], None] | None = None
+
+    def order(self, endpoint: str, candidates: tuple[str, ...]) -> list[str]:
+        known = self._variants.get(endpoint)
+        expires = self._expires.get(endpoint)
+        if expires is not None and time.time() >= expires:
+            known = None
+        if known not in candidates:
+            return list(candidates)
+        return [known, *(c for c in candidates if c != known)]
+
+    def remember(self, endpoint: str, variant: str, ttl: float | None = None) -> None:
+        expires = time.time() + ttl if ttl is not None else None
+        if self._variants.get(endpoint) == variant and self._expires.get(endpoint) == expires:
+            return
+        self._variants[endpoint] = variant
+        if expires is None:
+            self._expires.pop(endpoint, None)
+        else:
+            self._expires[endpoint] = expires
+        if self.on_change is not None:
+            self.on_change()
+
+    def as_dict(self) -> dict[str, str]:
+        return dict(self._variants)
+
+    def expires_as_dict(self) -> dict[str, float]:
+        return dict(self._expires)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """`Retry-After` în secunde; acceptă atât numărul de secunde cât și o dată HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max(0.0, (when - datetime.now(UTC)).total_seconds())
+
+
+class CircuitBreaker:
+    """Se deschide după `threshold` cereri consecutive ale unui endpoint eșuate trecător.
+
+    O cerere contează o singură dată, după ce reîncercările ei s-au epuizat.
+
+    Cât timp este deschis, cererile sunt refuzate local. După `cooldown` este
+    lăsată să treacă o singură cerere de probă; reușita ei închide circuitul,
+    altfel perioada de pauză reîncepe.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN_SEC):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.cooldown:
+            return False
+        # Proba: următoarea cerere mai așteaptă o perioadă întreagă
+        self.opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class CircuitBreakers:
+    """Câte un `CircuitBreaker` pe endpoint, partajat de toți clienții transportului."""
+
+    def __init__(
+        self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN_SEC
+    ) -> None:
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.retries = 0
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(self._threshold, self._cooldown)
+        return breaker
+
+    def open_endpoints(self) -> list[str]:
+        return [name for name, breaker in self._breakers.items() if breaker.is_open]
+
+
+class SingleFlight:
+    """Cererile identice aflate în zbor în același timp împart un singur răspuns.
+
+    Prima cerere pornește un task; cele care sosesc cât timp el rulează îl
+    așteaptă (protejat cu `shield`, ca anularea unui apelant să nu-i afecteze
+    pe ceilalți). Rezultatul nu este păstrat după ce task-ul se termină.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+
+    async def run(
+        self,
+        key: tuple,
+        factory: Callable[[], Awaitable[Any]],
+        on_join: Callable[[], None] | None = None,
+    ) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.hits += 1
+            if on_join is not None:
+                on_join()
+        return await asyncio.shield(task)
+
+    def _done(self, key: tuple, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Excepția este livrată apelanților; o marcăm ca preluată
+            task.exception()
+
+
+class TokenBucket:
+    """Limitează rata cererilor: `rate` pe secundă, cu rafale de până la `burst`.
+
+    Cererile care nu găsesc un jeton așteaptă la rând (FIFO). Așteptarea nu
+    depășește termenul refresh-ului: dacă jetonul ar veni prea târziu, se
+    ridică `EngieDeadlineExceeded`.
+    """
+
+    def __init__(
+        self, rate: float = DEFAULT_RATE_LIMIT_RPS, burst: int = DEFAULT_RATE_LIMIT_BURST
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.stats: dict[str, float] = {
+            "acquired": 0,
+            "delayed": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "wait_total_sec": 0.0,
+            "wait_max_sec": 0.0,
+        }
+
+    def configure(self, rate: float, burst: int) -> None:
+        self._refill(time.monotonic())
+        self.rate = max(0.01, float(rate))
+        self.burst = max(1, int(burst))
+        self._tokens = min(self._tokens, float(self.burst))
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        stats = self.stats
+        start = time.monotonic()
+        stats["queue_depth"] += 1
+        stats["max_queue_depth"] = max(stats["max_queue_depth"], stats["queue_depth"])
+        try:
+            async with self._lock:
+                while True:
+                    self._refill(time.monotonic())
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    delay = (1 - self._tokens) / self.rate
+                    remaining = deadline_remaining()
+                    if remaining is not None and delay + _MIN_REQUEST_SEC > remaining:
+                        raise EngieDeadlineExceeded("rate limit wait exceeds refresh deadline")
+                    await asyncio.sleep(delay)
+        finally:
+            stats["queue_depth"] -= 1
+        waited = time.monotonic() - start
+        stats["acquired"] += 1
+        if waited > 0.001:
+            stats["delayed"] += 1
+            stats["wait_total_sec"] += waited
+            stats["wait_max_sec"] = max(stats["wait_max_sec"], waited)
+
+
 class EngieClient:
     def __init__(
-        self, base_url: str, token: str = "", session: aiohttp.ClientSession | None = None
+        self,
+        base_url: str,
+        token: str = "",
+        session: aiohttp.ClientSession | None = None,
+        form_variants: FormVariantCache | None = None,
+        breakers: CircuitBreakers | None = None,
+        single_flight: SingleFlight | None = None,
+        rate_limiter: TokenBucket | None = None,
+        metrics: ApiMetrics | None = None,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.token = (token or "").strip()
+        self.form_variants = form_variants if form_variants is not None else FormVariantCache()
+        self.breakers = breakers if breakers is not None else CircuitBreakers()
+        self.single_flight = single_flight if single_flight is not None else SingleFlight()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket()
+        self._batch_failures = 0
+        # Măsurătorile acestui client; se adună și în `metrics` (cele partajate), dacă există
+        self.metrics = ApiMetrics(parent=metrics)
+        # O sesiune injectată (transportul partajat) nu este închisă de client
         self._session = session
+        self._owns_session = session is None
+        self._timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SEC)
         self.android_headers = {
             "source": "android",
             "App-Version": "2.0.33",
@@ -38,11 +372,12 @@ class EngieClient:
 
     async def _session_get(self) -> aiohttp.ClientSession:
         if self._session is None:
-            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+            self._owns_session = True
         return self._session
 
     async def close(self) -> None:
-        if self._session:
+        if self._session and self._owns_session:
             await self._session.close()
 
     def _headers(self) -> dict[str, str]:
@@ -66,81 +401,242 @@ class EngieClient:
         h["Device-Id"] = device_id
         return h
 
-    async def _get(self, path: str, params: dict[str, Any] | None = None) -> Any:
-        s = await self._session_get()
-        url = f"{self.base_url}{path}"
-        async with s.get(url, headers=self._headers(), params=params) as r:
-            txt = await r.text()
-            if r.status == 401:
-                raise EngieUnauthorized(f"GET {path} -> 401: {txt}")
-            if r.status >= 400:
-                raise EngieHTTPError(f"GET {path} -> {r.status}: {txt}")
+    def _request_timeout(self, what: str) -> aiohttp.ClientTimeout:
+        """Timeout-ul unei cereri: cel implicit, redus la cât a rămas din termenul refresh-ului."""
+        remaining = deadline_remaining()
+        if remaining is None:
+            return self._timeout
+        if remaining < _MIN_REQUEST_SEC:
+            raise EngieDeadlineExceeded(f"{what}: refresh deadline exceeded")
+        return aiohttp.ClientTimeout(total=min(HTTP_TIMEOUT_SEC, remaining))
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None = None,
+        endpoint: str | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Cerere cu reîncercări pentru erorile trecătoare și circuit breaker pe endpoint.
+
+        `endpoint` este numele stabil al endpoint-ului (fără POC), folosit pentru
+        breaker; implicit este `path`. Cererile identice (aceeași metodă, URL,
+        parametri, corp și token) făcute simultan sunt trimise o singură dată.
+        """
+        key = (
+            method,
+            f"{self.base_url}{path}",
+            json.dumps(kwargs, sort_keys=True, default=str),
+            hashlib.sha256(self.token.encode()).hexdigest(),
+        )
+        return await self.single_flight.run(
+            key,
+            lambda: self._request_with_retries(method, path, headers, endpoint, **kwargs),
+            on_join=self._count_coalesced,
+        )
+
+    def _count_coalesced(self) -> None:
+        self.metrics.coalesced += 1
+
+    async def _request_with_retries(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None,
+        endpoint: str | None,
+        **kwargs: Any,
+    ) -> Any:
+        name = f"{method} {endpoint or path}"
+        breaker = self.breakers.get(f"{method} {self.base_url}{endpoint or path}")
+        stats = self.metrics.endpoint(name)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise EngieCircuitOpen(f"{name}: circuit open after repeated failures")
             try:
-                return await r.json()
-            except Exception:
-                return txt
+                result = await self._request_once(method, path, headers, stats, **kwargs)
+            except EngieDeadlineExceeded:
+                raise
+            except EngieRetryableError as err:
+                attempt += 1
+                delay = self._retry_delay(err, attempt)
+                if delay is None:
+                    # Un singur eșec pe cerere, nu pe încercare: o pană scurtă pe
+                    # câteva locuri nu deschide circuitul pentru toată integrarea
+                    breaker.record_failure()
+                    raise
+                self.breakers.retries += 1
+                stats.record_retry()
+                _LOGGER.debug("%s: %s; reîncerc în %.1fs (%d)", name, err, delay, attempt)
+                await asyncio.sleep(delay)
+                continue
+            except EngieHTTPError:
+                # Endpoint-ul răspunde (4xx): nu este o pană
+                breaker.record_success()
+                raise
+            breaker.record_success()
+            return result
 
-    async def _post_form_json(self, path: str, form: dict[str, str]) -> Any:
+    @staticmethod
+    def _retry_delay(err: EngieRetryableError, attempt: int) -> float | None:
+        """Pauza înaintea reîncercării `attempt`, sau None dacă nu mai reîncercăm."""
+        if attempt >= RETRY_ATTEMPTS:
+            return None
+        if err.retry_after is not None:
+            if err.retry_after > RETRY_MAX_SEC:
+                return None
+            delay = err.retry_after
+        else:
+            delay = random.uniform(0, min(RETRY_MAX_SEC, RETRY_BASE_SEC * 2 ** (attempt - 1)))
+        remaining = deadline_remaining()
+        if remaining is not None and delay + _MIN_REQUEST_SEC > remaining:
+            return None
+        return delay
+
+    async def _request_once(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None,
+        stats: EndpointMetrics,
+        **kwargs: Any,
+    ) -> Any:
+        await self.rate_limiter.acquire()
         s = await self._session_get()
         url = f"{self.base_url}{path}"
-        async with s.post(url, headers=self._headers(), data=form) as r:
-            txt = await r.text()
-            if r.status == 401:
-                raise EngieUnauthorized(f"POST {path} -> 401: {txt}")
-            if r.status >= 400:
-                raise EngieHTTPError(f"POST {path} -> {r.status}: {txt}")
-            try:
-                return await r.json()
-            except Exception:
-                return txt
+        timeout = self._request_timeout(f"{method} {path}")
+        # Latența se măsoară după limitator: doar timpul petrecut pe rețea/server
+        started = time.monotonic()
+        size: int | None = None
+        ok = False
+        try:
+            async with s.request(
+                method, url, headers=headers or self._headers(), timeout=timeout, **kwargs
+            ) as r:
+                size = len(await r.read())
+                txt = await r.text()
+                if r.status == 401:
+                    raise EngieUnauthorized(f"{method} {path} -> 401: {txt}")
+                if r.status in _RETRYABLE_STATUS:
+                    raise EngieRetryableError(
+                        f"{method} {path} -> {r.status}: {txt}",
+                        _parse_retry_after(r.headers.get("Retry-After")),
+                    )
+                if r.status >= 400:
+                    raise EngieHTTPError(f"{method} {path} -> {r.status}: {txt}")
+                ok = True
+                try:
+                    return await r.json()
+                except Exception:
+                    return txt
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, TimeoutError) as err:
+            raise EngieRetryableError(f"{method} {path}: {err!r}") from err
+        finally:
+            stats.record(time.monotonic() - started, size, ok)
+
+    async def _get(
+        self, path: str, params: dict[str, Any] | None = None, endpoint: str | None = None
+    ) -> Any:
+        return await self._request("GET", path, endpoint=endpoint, params=params)
+
+    async def _post_form_json(self, path: str, form: dict[str, str] | list[tuple[str, str]]) -> Any:
+        return await self._request("POST", path, data=form)
 
     async def _post_json(self, path: str, payload: dict[str, Any]) -> Any:
-        s = await self._session_get()
-        url = f"{self.base_url}{path}"
         headers = dict(self._headers())
         headers["Content-Type"] = "application/json"
-        async with s.post(url, headers=headers, json=payload) as r:
-            txt = await r.text()
-            if r.status == 401:
-                raise EngieUnauthorized(f"POST {path} -> 401: {txt}")
-            if r.status >= 400:
-                raise EngieHTTPError(f"POST {path} -> {r.status}: {txt}")
+        return await self._request("POST", path, headers=headers, json=payload)
+
+    async def _post_contract_account(self, path: str, contract_account: str) -> Any:
+        """POST form cu contul contract, folosind varianta de cheie acceptată de endpoint."""
+        endpoint = f"{self.base_url}{path}"
+        last_err: EngieHTTPError | None = None
+        for key in self.form_variants.order(endpoint, _CONTRACT_ACCOUNT_KEYS):
             try:
-                return await r.json()
-            except Exception:
-                return txt
+                result = await self._post_form_json(path, {key: contract_account})
+            except (
+                EngieUnauthorized,
+                EngieCircuitOpen,
+                EngieDeadlineExceeded,
+                EngieRetryableError,
+            ):
+                # O pană trecătoare nu spune nimic despre forma cererii
+                raise
+            except EngieHTTPError as err:
+                # Doar un 4xx (formular respins) justifică încercarea celeilalte variante
+                last_err = err
+                continue
+            self.form_variants.remember(endpoint, key)
+            return result
+        raise last_err or EngieHTTPError(f"POST {path}: no form variant accepted")
 
-    async def mobile_login(
-        self, username: str, password: str, device_id: str
-    ) -> tuple[str, str | None, int | None, int | None]:
+    async def _mobile_auth_post(
+        self, what: str, path: str, payload: str, device_id: str
+    ) -> tuple[str, str | None, Any, Any]:
+        """POST de autentificare din aplicația mobilă; întoarce bundle-ul de token-uri."""
         s = await self._session_get()
-        url = f"{self.base_url}/v1/login"
+        url = f"{self.base_url}{path}"
         headers = self._headers_mobile(device_id)
         headers["Content-Type"] = "application/x-www-form-urlencoded"
+        await self.rate_limiter.acquire()
+        timeout = self._request_timeout(what)
+        try:
+            async with s.post(url, data=payload, headers=headers, timeout=timeout) as r:
+                txt = await r.text()
+                status = r.status
+                retry_after = _parse_retry_after(r.headers.get("Retry-After"))
+                j = None
+                if status < 400:
+                    try:
+                        j = await r.json()
+                    except Exception as err:
+                        raise EngieHTTPError(f"{what}: non-JSON response: {txt}") from err
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, TimeoutError) as err:
+            raise EngieRetryableError(f"{what}: {err!r}") from err
+        if status in (404, 405):
+            raise EngieNotSupported(f"{what} -> {status}: {txt}")
+        if status in (400, 401, 403):
+            raise EngieAuthRejected(f"{what} -> {status}: {txt}")
+        if status in _RETRYABLE_STATUS:
+            raise EngieRetryableError(f"{what} -> {status}: {txt}", retry_after)
+        if status >= 400:
+            raise EngieHTTPError(f"{what} -> {status}: {txt}")
+        data = j.get("data") if isinstance(j, dict) else None
+        if not isinstance(data, dict):
+            raise EngieHTTPError(f"{what}: unexpected JSON: {j}")
+        token = str(data.get("token") or "")
+        if not token:
+            raise EngieHTTPError(f"{what}: token missing in response: {j}")
+        refresh_token = data.get("refresh_token")
+        exp = data.get("exp")
+        refresh_epoch = data.get("refresh_token_expiration_date")
+        return token, refresh_token, exp, refresh_epoch
+
+    async def mobile_login(
+        self, username: str, password: str, device_id: str
+    ) -> tuple[str, str | None, Any, Any]:
         payload = f"username={quote_plus(username)}&password={quote_plus(password)}"
-        async with s.post(url, data=payload, headers=headers) as r:
-            txt = await r.text()
-            if r.status >= 400:
-                raise EngieHTTPError(f"LOGIN -> {r.status}: {txt}")
-            try:
-                j = await r.json()
-            except Exception as err:
-                raise EngieHTTPError(f"LOGIN: non-JSON response: {txt}") from err
-            data = j.get("data") if isinstance(j, dict) else None
-            if not isinstance(data, dict):
-                raise EngieHTTPError(f"LOGIN: unexpected JSON: {j}")
-            token = str(data.get("token") or "")
-            if not token:
-                raise EngieHTTPError(f"LOGIN: token missing in response: {j}")
-            refresh_token = data.get("refresh_token")
-            exp = data.get("exp")
-            refresh_epoch = data.get("refresh_token_expiration_date")
-            return token, refresh_token, exp, refresh_epoch
+        return await self._mobile_auth_post("LOGIN", "/v1/login", payload, device_id)
+
+    async def refresh_access_token(
+        self, refresh_token: str, device_id: str
+    ) -> tuple[str, str | None, Any, Any]:
+        """Token de acces nou pe baza refresh token-ului, fără utilizator/parolă.
+
+        Ridică EngieNotSupported dacă gateway-ul nu are endpoint-ul,
+        EngieAuthRejected dacă refresh token-ul este respins și
+        EngieRetryableError la erori trecătoare (429, 5xx, timeout, conexiune).
+        """
+        payload = f"refresh_token={quote_plus(refresh_token)}"
+        return await self._mobile_auth_post("REFRESH", REFRESH_TOKEN_PATH, payload, device_id)
 
     async def app_status_ok(self) -> bool:
         s = await self._session_get()
         url = f"{self.base_url}/v2/app_status"
-        async with s.get(url, headers=self._headers()) as r:
+        await self.rate_limiter.acquire()
+        timeout = self._request_timeout("app_status")
+        async with s.get(url, headers=self._headers(), timeout=timeout) as r:
             if r.status == 200:
                 return True
             if r.status == 401:
@@ -159,7 +655,11 @@ class EngieClient:
 
     async def get_divisions(self, poc_number: str, pa: str | None = None) -> Any:
         params = {"pa": pa} if pa else None
-        return await self._get(f"/v1/placesofconsumption/divisions/{poc_number}", params=params)
+        return await self._get(
+            f"/v1/placesofconsumption/divisions/{poc_number}",
+            params=params,
+            endpoint="/v1/placesofconsumption/divisions/{poc}",
+        )
 
     async def get_index_window(
         self,
@@ -173,27 +673,51 @@ class EngieClient:
             params["pa"] = pa
         if installation_number:
             params["installation_number"] = installation_number
-        return await self._get(f"/v1/index/{poc_number}", params=params)
+        return await self._get(f"/v1/index/{poc_number}", params=params, endpoint="/v1/index/{poc}")
 
     async def get_balance(self, contract_account: str) -> Any:
-        try:
-            return await self._post_form_json(
-                "/v1/widgets/ballance", {"contract_account[]": contract_account}
-            )
-        except EngieHTTPError:
-            return await self._post_form_json(
-                "/v1/widgets/ballance", {"contract_account": contract_account}
-            )
+        return await self._post_contract_account("/v1/widgets/ballance", contract_account)
 
     async def get_invoices_details(self, contract_account: str) -> Any:
-        try:
-            return await self._post_form_json(
-                "/v1/invoices/ballance-details", {"contract_account[]": contract_account}
-            )
-        except EngieHTTPError:
-            return await self._post_form_json(
-                "/v1/invoices/ballance-details", {"contract_account": contract_account}
-            )
+        return await self._post_contract_account("/v1/invoices/ballance-details", contract_account)
+
+    async def get_invoices_details_batch(self, contract_accounts: list[str]) -> Any:
+        """Un singur POST cu mai multe conturi (`contract_account[]` repetat).
+
+        Ridică EngieNotSupported dacă endpoint-ul este cunoscut ca neacceptând forma
+        de array sau cererile batch au fost dezactivate, ca apelantul să revină la
+        cereri individuale.
+        """
+        path = "/v1/invoices/ballance-details"
+        endpoint = f"{self.base_url}{path}"
+        array_key = _CONTRACT_ACCOUNT_KEYS[0]
+        if self.form_variants.order(f"{endpoint}#batch", _BATCH_VARIANTS)[0] != "batch":
+            raise EngieNotSupported(f"POST {path}: batch requests disabled")
+        if self.form_variants.order(endpoint, _CONTRACT_ACCOUNT_KEYS)[0] != array_key:
+            raise EngieNotSupported(f"POST {path}: array form not accepted by endpoint")
+        result = await self._post_form_json(path, [(array_key, ca) for ca in contract_accounts])
+        self.form_variants.remember(endpoint, array_key)
+        return result
+
+    def invoices_batch_succeeded(self) -> None:
+        self._batch_failures = 0
+
+    def invoices_batch_failed(self) -> None:
+        """Un lot respins sau neatribuibil; după câteva consecutive, batch-ul se oprește.
+
+        Oprirea este persistentă, dar expiră după `INVOICES_BATCH_REPROBE_SEC`,
+        când batch-ul este încercat din nou.
+        """
+        self._batch_failures += 1
+        if self._batch_failures < INVOICES_BATCH_DISABLE_AFTER:
+            return
+        self._batch_failures = 0
+        _LOGGER.info("Engie: cererile batch de sold eșuează repetat; revin la cereri individuale")
+        self.form_variants.remember(
+            f"{self.base_url}/v1/invoices/ballance-details#batch",
+            "single",
+            ttl=INVOICES_BATCH_REPROBE_SEC,
+        )
 
     async def get_consumption(
         self, poc_number: str, start_date: str, end_date: str, pa: str | None = None
@@ -202,7 +726,11 @@ class EngieClient:
         params: dict[str, Any] = {"startDate": start_date, "endDate": end_date}
         if pa:
             params["pa"] = pa
-        return await self._get(f"/v1/index/consumption/{poc_number}", params=params)
+        return await self._get(
+            f"/v1/index/consumption/{poc_number}",
+            params=params,
+            endpoint="/v1/index/consumption/{poc}",
+        )
 
     async def get_index_history_post(
         self, autocit: str, poc_number: str, division: str, start_date: str
@@ -223,4 +751,8 @@ class EngieClient:
         params: dict[str, Any] = {"startDate": start_date, "endDate": end_date}
         if pa:
             params["pa"] = pa
-        return await self._get(f"/v1/invoices/history-only/{poc_number}", params=params)
+        return await self._get(
+            f"/v1/invoices/history-only/{poc_number}",
+            params=params,
+            endpoint="/v1/invoices/history-only/{poc}",
+        )
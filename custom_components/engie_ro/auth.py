@@ -3,17 +3,34 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-import os
+import random
 import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
 from pathlib import Path
+from typing import Any
 
-from .api import EngieClient, EngieHTTPError, EngieUnauthorized
-from .const import AUTH_MODE_MOBILE, DEFAULT_TOKEN_FILE
+from .api import (
+    EngieAuthRejected,
+    EngieClient,
+    EngieDeadlineExceeded,
+    EngieHTTPError,
+    EngieNotSupported,
+    EngieRetryableError,
+    EngieUnauthorized,
+)
+from .const import AUTH_MODE_MOBILE
 
 _LOGGER = logging.getLogger(__name__)
 
 # Reîmprospătează token-ul cu 5 minute înainte de expirare
 _REFRESH_MARGIN_SEC = 300
+# Reînnoirea din fundal pornește cu până la atâtea secunde înaintea pragului de mai sus,
+# ca un refresh de date să nu ajungă niciodată să reînnoiască el token-ul
+_RENEW_JITTER_SEC = 120
+# Backoff pentru reînnoirile din fundal eșuate
+_RENEW_RETRY_SEC = 30
+_RENEW_RETRY_MAX_SEC = 900
 
 
 def _exp_epoch_from_response(exp_raw: object, now: float) -> float:
@@ -37,6 +54,20 @@ def _exp_epoch_from_response(exp_raw: object, now: float) -> float:
     return now + val
 
 
+def _refresh_exp_epoch(raw: object, now: float) -> float | None:
+    """Expirarea refresh token-ului: epoch, secunde rămase sau dată ISO; None dacă e necunoscută."""
+    if raw is None or raw == "":
+        return None
+    try:
+        return _exp_epoch_from_response(int(float(str(raw))), now)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(raw)).timestamp()
+    except ValueError:
+        return None
+
+
 class EngieAuthManager:
     def __init__(
         self,
@@ -47,21 +78,45 @@ class EngieAuthManager:
         device_id: str,
         auth_mode: str,
         bearer_token: str | None,
+        token_store: Any = None,
+        store_key: str = "",
     ):
         self.client = client
         self.username = username
         self.password = password
-        self.token_path = Path(token_file or DEFAULT_TOKEN_FILE)
+        # Fișierul de token din versiunile anterioare; citit (și șters) doar pentru migrare
+        self.token_path = Path(token_file) if token_file else None
+        # `async_get`/`async_set` pe `store_key` (vezi token_store.py); fără el token-ul
+        # trăiește doar în memorie
+        self.token_store = token_store
+        self.store_key = store_key
         self.device_id = device_id
         self.auth_mode = auth_mode
         self.initial_bearer = (bearer_token or "").strip()
+        self._token: str | None = None
         self._exp_epoch: float | None = None
+        self._loaded = False
+        self._refresh_token: str | None = None
+        self._refresh_exp: float | None = None
+        # Devine False dacă gateway-ul nu are endpoint-ul de refresh
+        self._refresh_supported = True
         self._lock = asyncio.Lock()
+        # Semnalat la fiecare token nou, ca reînnoirea din fundal să se reprogrameze
+        self._token_changed = asyncio.Event()
+        # Crește la fiecare token nou; un 401 primit cu o generație veche nu mai reînnoiește
+        self.generation = 0
+        self.stats: dict[str, int] = {
+            "logins": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "unauthorized": 0,
+            "unauthorized_coalesced": 0,
+        }
 
-    async def _read_token_from_file(self) -> dict | None:
+    async def _read_legacy_file(self) -> dict | None:
+        if self.token_path is None:
+            return None
         try:
-            if not self.token_path.exists():
-                return None
             txt = await asyncio.to_thread(self.token_path.read_text, encoding="utf-8")
             txt = txt.strip()
             if not txt:
@@ -69,42 +124,87 @@ class EngieAuthManager:
             if txt.startswith("{"):
                 return json.loads(txt)
             return {"token": txt}
+        except FileNotFoundError:
+            return None
         except Exception as e:
             _LOGGER.debug("Cannot read token file: %s", e)
             return None
 
-    async def _write_token_to_file(self, bundle: dict) -> None:
+    async def _remove_legacy_file(self) -> None:
+        """Șterge fișierul vechi: conține token-urile în clar și nu mai este folosit."""
         try:
-            self.token_path.parent.mkdir(parents=True, exist_ok=True)
-            tmp = self.token_path.with_suffix(self.token_path.suffix + ".tmp")
-            await asyncio.to_thread(
-                tmp.write_text,
-                json.dumps(bundle, ensure_ascii=False, indent=0),
-                encoding="utf-8",
+            await asyncio.to_thread(self.token_path.unlink, missing_ok=True)
+        except OSError as e:
+            _LOGGER.warning(
+                "Engie: nu pot șterge fișierul vechi de token %s: %s", self.token_path, e
             )
-            os.replace(tmp, self.token_path)
-        except Exception as e:
-            _LOGGER.warning("Cannot write token to file %s: %s", self.token_path, e)
 
-    async def _do_login(self) -> str:
-        """Efectuează login complet și salvează bundle-ul în fișier."""
-        if not self.username or not self.password:
-            raise EngieHTTPError("Lipsesc username/password pentru mobile login.")
-        _LOGGER.debug("Engie: efectuez login pentru %s", self.username)
-        token, refresh_token, exp_raw, refresh_epoch = await self.client.mobile_login(
-            self.username, self.password, self.device_id
+    async def _async_load_saved(self) -> None:
+        """Preia bundle-ul salvat, o singură dată per instanță.
+
+        Sursa e store-ul comun; dacă intrarea nu are încă un bundle acolo, e
+        importat fișierul de token folosit de versiunile anterioare.
+        """
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.token_store is None:
+            return
+        bundle = await self.token_store.async_get(self.store_key)
+        if bundle is None:
+            bundle = await self._read_legacy_file()
+            if bundle and bundle.get("token"):
+                _LOGGER.debug("Engie: import token-ul din %s în store", self.token_path)
+                await self.token_store.async_set(self.store_key, bundle)
+                await self.token_store.async_flush()
+                await self._remove_legacy_file()
+        tok = (bundle or {}).get("token", "")
+        if not tok:
+            return
+        exp_epoch = bundle.get("exp_epoch")
+        try:
+            exp_epoch = float(exp_epoch) if exp_epoch is not None else None
+        except (TypeError, ValueError):
+            exp_epoch = None
+        self._token = tok
+        self._exp_epoch = exp_epoch
+        self._refresh_token = bundle.get("refresh_token") or None
+        self._refresh_exp = _refresh_exp_epoch(
+            bundle.get("refresh_token_expiration_date"), time.time()
         )
+        self.generation += 1
+        self._token_changed.set()
+
+    def _cached_token(self) -> str | None:
+        """Token-ul din memorie, dacă a fost deja încărcat și nu e aproape de expirare."""
+        if not self._loaded or not self._token or self._token_needs_refresh(self._exp_epoch):
+            return None
+        return self._token
+
+    async def _save_tokens(
+        self, token: str, refresh_token: str | None, exp_raw: object, refresh_raw: object
+    ) -> str:
+        """Adoptă un token nou (după login sau refresh) și salvează bundle-ul în store."""
         now = time.time()
         exp_epoch = _exp_epoch_from_response(exp_raw, now)
+        self._token = token
         self._exp_epoch = exp_epoch
+        # Cererile care pornesc de acum folosesc noua generație
+        self.client.token = token
+        self.generation += 1
+        if refresh_token:
+            # Gateway-ul poate roti refresh token-ul; altfel îl păstrăm pe cel curent
+            self._refresh_token = refresh_token
+            self._refresh_exp = _refresh_exp_epoch(refresh_raw, now)
         bundle = {
             "token": token,
-            "refresh_token": refresh_token,
+            "refresh_token": self._refresh_token,
             "exp_epoch": exp_epoch,
-            "refresh_token_expiration_date": refresh_epoch,
+            "refresh_token_expiration_date": self._refresh_exp,
         }
-        await self._write_token_to_file(bundle)
-        self.client.token = token
+        if self.token_store is not None:
+            await self.token_store.async_set(self.store_key, bundle)
+        self._token_changed.set()
         _LOGGER.debug(
             "Engie: token obținut, expiră la epoch %.0f (peste %.0f minute)",
             exp_epoch,
@@ -112,6 +212,50 @@ class EngieAuthManager:
         )
         return token
 
+    async def _do_login(self) -> str:
+        """Efectuează login complet și salvează bundle-ul în store."""
+        if not self.username or not self.password:
+            raise EngieHTTPError("Lipsesc username/password pentru mobile login.")
+        _LOGGER.debug("Engie: efectuez login pentru %s", self.username)
+        token, refresh_token, exp_raw, refresh_raw = await self.client.mobile_login(
+            self.username, self.password, self.device_id
+        )
+        self.stats["logins"] += 1
+        return await self._save_tokens(token, refresh_token, exp_raw, refresh_raw)
+
+    def _can_refresh(self) -> bool:
+        if not (self._refresh_supported and self._refresh_token):
+            return False
+        return self._refresh_exp is None or time.time() < self._refresh_exp - _REFRESH_MARGIN_SEC
+
+    async def _renew(self) -> str:
+        """Token nou: prin refresh token cât timp e valabil, altfel login complet."""
+        if self._can_refresh():
+            try:
+                token, refresh_token, exp_raw, refresh_raw = await self.client.refresh_access_token(
+                    self._refresh_token, self.device_id
+                )
+            except (EngieDeadlineExceeded, EngieRetryableError):
+                # Eroare trecătoare: refresh token-ul rămâne valabil pentru reîncercare
+                self.stats["refresh_failures"] += 1
+                raise
+            except EngieNotSupported as e:
+                self._refresh_supported = False
+                self.stats["refresh_failures"] += 1
+                _LOGGER.debug("Engie: refresh token nesuportat (%s); folosesc login complet", e)
+            except EngieAuthRejected as e:
+                self._refresh_token = None
+                self.stats["refresh_failures"] += 1
+                _LOGGER.debug("Engie: refresh token respins (%s); fac login complet", e)
+            except EngieHTTPError as e:
+                self.stats["refresh_failures"] += 1
+                _LOGGER.debug("Engie: refresh eșuat (%s); fac login complet", e)
+            else:
+                self.stats["refreshes"] += 1
+                _LOGGER.debug("Engie: token reînnoit cu refresh token-ul")
+                return await self._save_tokens(token, refresh_token, exp_raw, refresh_raw)
+        return await self._do_login()
+
     def _token_needs_refresh(self, exp_epoch: float | None) -> bool:
         """Returnează True dacă token-ul expiră în mai puțin de _REFRESH_MARGIN_SEC."""
         if exp_epoch is None:
@@ -121,53 +265,140 @@ class EngieAuthManager:
     async def ensure_valid_token(self) -> str:
         """Asigură că clientul are un token valid înainte de orice apel API.
 
-        Folosește un lock pentru a evita login-uri paralele în cazul mai multor
-        update-uri concurente.
+        Calea obișnuită nu ia lock-ul și nu atinge discul: token-ul din memorie
+        este folosit cât timp nu e aproape de expirare; store-ul e citit o singură
+        dată. Lock-ul evită login-uri paralele în cazul mai multor update-uri
+        concurente.
         """
         if self.initial_bearer:
             self.client.token = self.initial_bearer
             return self.initial_bearer
 
-        async with self._lock:
-            # Re-citim fișierul de fiecare dată — alt proces/restart ar fi putut
-            # actualiza token-ul între timp
-            bundle = await self._read_token_from_file()
-            if bundle:
-                tok = bundle.get("token", "")
-                exp_epoch = bundle.get("exp_epoch")
-                try:
-                    exp_epoch = float(exp_epoch) if exp_epoch is not None else None
-                except (TypeError, ValueError):
-                    exp_epoch = None
+        cached = self._cached_token()
+        if cached:
+            self.client.token = cached
+            return cached
 
-                if tok and not self._token_needs_refresh(exp_epoch):
+        async with self._lock:
+            await self._async_load_saved()
+            tok = self._token
+            if tok:
+                if not self._token_needs_refresh(self._exp_epoch):
                     # Token valid, folosim direct
                     self.client.token = tok
-                    self._exp_epoch = exp_epoch
                     return tok
 
-                if tok and self.auth_mode == AUTH_MODE_MOBILE:
+                if self.auth_mode == AUTH_MODE_MOBILE:
                     # Token aproape expirat — reînnoim proactiv
                     _LOGGER.debug("Engie: token expiră curând, reînnoiesc proactiv.")
-                    return await self._do_login()
+                    return await self._renew()
 
             # Nu avem token sau a expirat complet
             if self.auth_mode == AUTH_MODE_MOBILE:
-                return await self._do_login()
+                return await self._renew()
 
             raise EngieUnauthorized(
                 "Bearer token lipsă sau invalid. Furnizați un token valid sau treceți la mobile login."
             )
 
-    async def refresh_after_401(self) -> str:
-        """Apelat de coordinator după un 401 neașteptat în timpul unui apel API.
+    def _renewal_delay(self, failures: int) -> float | None:
+        """Secunde până la următoarea reînnoire din fundal; None = așteaptă un token."""
+        if failures:
+            return min(_RENEW_RETRY_MAX_SEC, _RENEW_RETRY_SEC * 2 ** (failures - 1))
+        if self._exp_epoch is None:
+            return None
+        now = time.time()
+        renew_at = self._exp_epoch - _REFRESH_MARGIN_SEC - random.uniform(0, _RENEW_JITTER_SEC)
+        # Token-urile mai scurte decât marja sunt reînnoite la jumătatea duratei, nu în buclă
+        return max(renew_at - now, (self._exp_epoch - now) / 2, 0.0)
+
+    async def async_renewal_loop(self) -> None:
+        """Reînnoiește token-ul în fundal, înainte ca un refresh de date să aibă nevoie de el.
+
+        Rulează cât timp intrarea e încărcată. Reînnoirea e programată înaintea
+        pragului din `ensure_valid_token`, deci refresh-urile găsesc mereu un token
+        valid; eșecurile sunt reîncercate cu backoff, iar calea din
+        `ensure_valid_token` rămâne plasa de siguranță.
+        """
+        if self.initial_bearer or self.auth_mode != AUTH_MODE_MOBILE:
+            return
+        async with self._lock:
+            await self._async_load_saved()
+        failures = 0
+        renewed = False
+        expired_logged = False
+        while True:
+            self._token_changed.clear()
+            token = self._token
+            delay = self._renewal_delay(failures)
+            if renewed and delay is not None and delay < _RENEW_RETRY_SEC:
+                # Token primit deja expirat după ceasul local (ceas decalat sau `exp`
+                # degenerat): fără pauză minimă bucla ar face login-uri continue
+                if not expired_logged:
+                    expired_logged = True
+                    _LOGGER.warning(
+                        "Engie: token-ul reînnoit expiră imediat după ceasul local "
+                        "(exp=%s); verificați ora sistemului",
+                        self._exp_epoch,
+                    )
+                delay = _RENEW_RETRY_SEC
+            renewed = False
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._token_changed.wait(), delay)
+                except TimeoutError:
+                    pass
+                else:
+                    # Token nou (login, refresh sau alt proces): reprogramăm
+                    failures = 0
+                    continue
+            try:
+                async with self._lock:
+                    # Un 401 ar fi putut reînnoi token-ul cât am așteptat lock-ul
+                    if self._token == token:
+                        _LOGGER.debug("Engie: reînnoiesc token-ul în fundal")
+                        await self._renew()
+            except Exception as e:
+                # Inclusiv erori de rețea: bucla trebuie să supraviețuiască
+                failures += 1
+                _LOGGER.log(
+                    logging.WARNING if failures == 1 else logging.DEBUG,
+                    "Engie: reînnoirea token-ului în fundal a eșuat (%s); reîncerc",
+                    e,
+                )
+            else:
+                failures = 0
+                renewed = True
+
+    async def refresh_after_401(self, generation: int | None = None) -> str:
+        """Apelat după un 401 neașteptat în timpul unui apel API.
 
-        Forțează re-login indiferent de starea curentă a token-ului.
+        `generation` este generația token-ului cu care a plecat cererea respinsă.
+        Dacă între timp alt apel a obținut deja un token nou, acesta este folosit
+        direct; astfel mai multe 401 concurente pe același token duc la o singură
+        reînnoire. Fără `generation`, reînnoirea este forțată.
         """
         if self.auth_mode != AUTH_MODE_MOBILE:
             raise EngieUnauthorized(
                 "Bearer token expirat/invalid. Actualizați token-ul din Opțiuni."
             )
         async with self._lock:
-            _LOGGER.warning("Engie: 401 neașteptat — forțez re-login.")
-            return await self._do_login()
+            self.stats["unauthorized"] += 1
+            if generation is not None and generation != self.generation and self._token:
+                self.stats["unauthorized_coalesced"] += 1
+                self.client.token = self._token
+                return self._token
+            _LOGGER.warning("Engie: 401 neașteptat — forțez reînnoirea token-ului.")
+            return await self._renew()
+
+    async def call_with_reauth(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Rulează `request()`; după un 401 reînnoiește token-ul și reia cererea o dată.
+
+        Un al doilea 401, ca și erorile reînnoirii, ajung la apelant.
+        """
+        generation = self.generation
+        try:
+            return await request()
+        except EngieUnauthorized:
+            await self.refresh_after_401(generation)
+        return await request()
@@ -14,33 +14,25 @@ from .const import (
     CONF_BASE_URL,
     CONF_BEARER_TOKEN,
     CONF_DEVICE_ID,
+    CONF_INVOICES_BATCH_SIZE,
+    CONF_KEEP_RAW_PAYLOADS,
+    CONF_MAX_CONCURRENT_PLACES,
     CONF_PASSWORD,
+    CONF_RATE_LIMIT_BURST,
+    CONF_RATE_LIMIT_RPS,
     CONF_TOKEN_FILE,
     CONF_USERNAME,
     DEFAULT_BASE_URL,
-    DEFAULT_TOKEN_FILE,
+    DEFAULT_INVOICES_BATCH_SIZE,
+    DEFAULT_MAX_CONCURRENT_PLACES,
+    DEFAULT_RATE_LIMIT_BURST,
+    DEFAULT_RATE_LIMIT_RPS,
     DOMAIN,
 )
 
 AUTH_MODES = [AUTH_MODE_MOBILE, AUTH_MODE_BEARER]
 
 
-def _unique_token_file(username: str = "") -> str:
-    """Return a unique token file path. Always guaranteed to be unique."""
-    if username:
-        safe = (
-            username.strip()
-            .lower()
-            .replace("@", "_at_")
-            .replace(".", "_")
-            .replace("+", "_")
-            .replace(" ", "_")
-        )
-        return f"/config/engie_token_{safe}.txt"
-    # No username (bearer mode) — use a short random suffix
-    return f"/config/engie_token_{uuid.uuid4().hex[:8]}.txt"
-
-
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
@@ -49,18 +41,15 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             username = (user_input.get(CONF_USERNAME) or "").strip().lower()
-            token_file = (user_input.get(CONF_TOKEN_FILE) or "").strip()
 
             # Unique ID = username for mobile, or a uuid for bearer
             unique_basis = username if username else uuid.uuid4().hex
             await self.async_set_unique_id(unique_basis)
             self._abort_if_unique_id_configured()
 
-            # Always assign a unique token file — override default or empty values
-            if not token_file or token_file == DEFAULT_TOKEN_FILE:
-                token_file = _unique_token_file(username)
-            user_input[CONF_TOKEN_FILE] = token_file
-
+            # Token-urile stau în `.storage`; calea goală marchează că intrarea nu are
+            # un fișier vechi de migrat (spre deosebire de intrările fără cheie)
+            user_input[CONF_TOKEN_FILE] = ""
             user_input[CONF_DEVICE_ID] = (
                 user_input.get(CONF_DEVICE_ID) or "ha-" + uuid.uuid4().hex[:12]
             )
@@ -73,7 +62,6 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_USERNAME): str,
                 vol.Optional(CONF_PASSWORD): str,
                 vol.Optional(CONF_BEARER_TOKEN): str,
-                vol.Optional(CONF_TOKEN_FILE, default=DEFAULT_TOKEN_FILE): str,
                 vol.Optional(CONF_BASE_URL, default=DEFAULT_BASE_URL): str,
             }
         )
@@ -97,8 +85,12 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_USERNAME,
                 CONF_PASSWORD,
                 CONF_BEARER_TOKEN,
-                CONF_TOKEN_FILE,
                 CONF_BASE_URL,
+                CONF_MAX_CONCURRENT_PLACES,
+                CONF_INVOICES_BATCH_SIZE,
+                CONF_RATE_LIMIT_RPS,
+                CONF_RATE_LIMIT_BURST,
+                CONF_KEEP_RAW_PAYLOADS,
             ):
                 if key in user_input and user_input[key] is not None:
                     new_data[key] = user_input[key]
@@ -114,11 +106,26 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Optional(CONF_USERNAME, default=d.get(CONF_USERNAME, "")): str,
                 vol.Optional(CONF_PASSWORD, default=d.get(CONF_PASSWORD, "")): str,
                 vol.Optional(CONF_BEARER_TOKEN, default=d.get(CONF_BEARER_TOKEN, "")): str,
-                vol.Optional(
-                    CONF_TOKEN_FILE,
-                    default=d.get(CONF_TOKEN_FILE, DEFAULT_TOKEN_FILE),
-                ): str,
                 vol.Optional(CONF_BASE_URL, default=d.get(CONF_BASE_URL, DEFAULT_BASE_URL)): str,
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_PLACES,
+                    default=d.get(CONF_MAX_CONCURRENT_PLACES, DEFAULT_MAX_CONCURRENT_PLACES),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                vol.Optional(
+                    CONF_INVOICES_BATCH_SIZE,
+                    default=d.get(CONF_INVOICES_BATCH_SIZE, DEFAULT_INVOICES_BATCH_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+                vol.Optional(
+                    CONF_RATE_LIMIT_RPS,
+                    default=d.get(CONF_RATE_LIMIT_RPS, DEFAULT_RATE_LIMIT_RPS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=50)),
+                vol.Optional(
+                    CONF_RATE_LIMIT_BURST,
+                    default=d.get(CONF_RATE_LIMIT_BURST, DEFAULT_RATE_LIMIT_BURST),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Optional(
+                    CONF_KEEP_RAW_PAYLOADS, default=d.get(CONF_KEEP_RAW_PAYLOADS, False)
+                ): bool,
             }
         )
         return self.async_show_form(step_id="init", data_schema=schema)
@@ -1,18 +1,77 @@
 DOMAIN = "engie_ro"
+DATA_TRANSPORT = f"{DOMAIN}_transport"
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+DATA_TOKENS = f"{DOMAIN}_tokens"
+DATA_STORES = f"{DOMAIN}_stores"
 
 CONF_BASE_URL = "base_url"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_TOKEN_FILE = "token_file_path"
+# Fișierul de token implicit al versiunilor vechi (intrările fără CONF_TOKEN_FILE)
+DEFAULT_TOKEN_FILE = "/config/engie_token.txt"
 CONF_DEVICE_ID = "device_id"
 CONF_AUTH_MODE = "auth_mode"
 CONF_BEARER_TOKEN = "bearer_token"
+CONF_MAX_CONCURRENT_PLACES = "max_concurrent_places"
+CONF_INVOICES_BATCH_SIZE = "invoices_batch_size"
+CONF_RATE_LIMIT_RPS = "rate_limit_rps"
+CONF_RATE_LIMIT_BURST = "rate_limit_burst"
+CONF_KEEP_RAW_PAYLOADS = "keep_raw_payloads"
 
 AUTH_MODE_MOBILE = "mobile_login"
 AUTH_MODE_BEARER = "bearer"
 
 DEFAULT_BASE_URL = "https://gwss.engie.ro/myservices"
-DEFAULT_TOKEN_FILE = "/config/engie_token.txt"
 UPDATE_INTERVAL_SEC = 1800  # 30 min
+# Câte locuri de consum se interoghează în paralel la un refresh
+DEFAULT_MAX_CONCURRENT_PLACES = 4
+# Câte conturi contract se trimit într-o singură cerere ballance-details (1 = fără batch)
+DEFAULT_INVOICES_BATCH_SIZE = 10
+# Cererile batch se opresc abia după atâtea loturi consecutive respinse sau
+# neatribuibile, și se reîncearcă după REPROBE_SEC
+INVOICES_BATCH_DISABLE_AFTER = 3
+INVOICES_BATCH_REPROBE_SEC = 7 * 86400
+# Limită comună (token bucket) pentru toate cererile către gateway, din toate
+# intrările; dacă intrările au valori diferite se aplică cea mai mică
+# Rafala acoperă un refresh complet (~5-6 cereri pe loc, ~60 pentru 10 locuri),
+# astfel încât limita oprește doar buclele de reîncercări, nu refresh-urile normale
+DEFAULT_RATE_LIMIT_RPS = 10.0
+DEFAULT_RATE_LIMIT_BURST = 60
+
+# TTL pe clase de date: profil/locuri și adrese zilnic, fereastra de citire orar,
+# istoricele zilnic (sau la apariția unei facturi noi); soldul la fiecare refresh
+TIER_ACCOUNT_SEC = 86400
+TIER_DIVISIONS_SEC = 86400
+TIER_INDEX_WINDOW_SEC = 3600
+TIER_HISTORY_SEC = 86400
+TIER_SLACK_SEC = 120
+# Istoricul persistent se completează cerând doar zilele de după ultima intrare
+# cunoscută, cu o suprapunere pentru corecții
+HISTORY_OVERLAP_DAYS = 62
+# Fereastra afișată de senzori (istoricul din store rămâne complet)
+CONSUMPTION_WINDOW_DAYS = 365
+INDEX_HISTORY_WINDOW_DAYS = 3 * 365
+# Termen limită pentru fiecare fază a refresh-ului; ce nu se termină la timp
+# păstrează ultima valoare cunoscută (marcată ca veche)
+REFRESH_DEADLINE_SEC = 90
+ENRICHMENT_DEADLINE_SEC = 240
+
+# Transport HTTP partajat (toate conturile)
+HTTP_TIMEOUT_SEC = 30
+TRANSPORT_LIMIT = 32
+TRANSPORT_LIMIT_PER_HOST = 8
+# Conexiunile rămân deschise cât durează rafala unui refresh
+TRANSPORT_KEEPALIVE_SEC = 60
+TRANSPORT_DNS_TTL_SEC = 600
+
+# Reîncercări pentru 429/5xx/timeout: backoff exponențial cu jitter complet
+RETRY_ATTEMPTS = 3
+RETRY_BASE_SEC = 1.0
+RETRY_MAX_SEC = 20.0
+# După atâtea cereri eșuate consecutiv (după reîncercări) un endpoint este ocolit
+# (pentru toate locurile)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN_SEC = 300
 
 ATTRIBUTION = "Date furnizate de Engie România"
@@ -1,73 +1,118 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import UTC, datetime, timedelta
+import time
+from collections.abc import Awaitable, Callable, Collection, Iterable, Mapping
+from dataclasses import replace
+from datetime import UTC, date, datetime, timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import EngieClient, EngieHTTPError, EngieUnauthorized
+from . import tiers
+from .api import (
+    EngieCircuitOpen,
+    EngieClient,
+    EngieDeadlineExceeded,
+    EngieHTTPError,
+    EngieNotSupported,
+    EngieRetryableError,
+    EngieUnauthorized,
+    deadline_remaining,
+    request_deadline,
+)
 from .auth import EngieAuthManager
 from .const import (
-    ATTRIBUTION,
     AUTH_MODE_MOBILE,
     CONF_AUTH_MODE,
     CONF_BASE_URL,
     CONF_BEARER_TOKEN,
     CONF_DEVICE_ID,
+    CONF_INVOICES_BATCH_SIZE,
+    CONF_KEEP_RAW_PAYLOADS,
+    CONF_MAX_CONCURRENT_PLACES,
     CONF_PASSWORD,
+    CONF_RATE_LIMIT_BURST,
+    CONF_RATE_LIMIT_RPS,
     CONF_TOKEN_FILE,
     CONF_USERNAME,
+    CONSUMPTION_WINDOW_DAYS,
+    DATA_STORES,
     DEFAULT_BASE_URL,
+    DEFAULT_INVOICES_BATCH_SIZE,
+    DEFAULT_MAX_CONCURRENT_PLACES,
+    DEFAULT_RATE_LIMIT_BURST,
+    DEFAULT_RATE_LIMIT_RPS,
     DEFAULT_TOKEN_FILE,
-    UPDATE_INTERVAL_SEC,
+    DOMAIN,
+    ENRICHMENT_DEADLINE_SEC,
+    INDEX_HISTORY_WINDOW_DAYS,
+    REFRESH_DEADLINE_SEC,
 )
+from .history import CONSUMPTION as HISTORY_CONSUMPTION
+from .history import READINGS as HISTORY_READINGS
+from .history import EngieHistoryStore, PlaceHistory
+from .metrics import RefreshMetrics
+from .model import SLICE_FIELDS, EngieData, Invoice, PlaceSnapshot, Profile, Reading
+from .series import TimeSeries
+from .token_store import async_get_token_store
+from .transport import EngieTransport
 
 _LOGGER = logging.getLogger(__name__)
 
-_RO_MONTHS = [
-    "",
-    "ianuarie",
-    "februarie",
-    "martie",
-    "aprilie",
-    "mai",
-    "iunie",
-    "iulie",
-    "august",
-    "septembrie",
-    "octombrie",
-    "noiembrie",
-    "decembrie",
-]
+_SNAPSHOT_VERSION = 3
+_SNAPSHOT_SAVE_DELAY_SEC = 10
+_DEADLINE_GRACE_SEC = 2.0
 
 
-# ---------------------------------------------------------------------------
-# Formatting helpers
-# ---------------------------------------------------------------------------
+class _EntryStores:
+    """Istoricul și snapshot-ul unei intrări, comune coordinatorului și ștergerii."""
 
+    __slots__ = ("history", "snapshot", "_snapshot_data")
 
-def _fmt_money_lei(value: float | int | str | None) -> str:
-    try:
-        val = float(str(value).replace(",", "."))
-    except Exception:
-        return ""
-    s = f"{val:.2f}".replace(".", ",")
-    return f"{s} lei"
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.history = EngieHistoryStore(hass, entry_id)
+        self.snapshot: Store = Store(hass, _SNAPSHOT_VERSION, f"{DOMAIN}.snapshot.{entry_id}")
+        self._snapshot_data: Callable[[], dict[str, Any]] | None = None
 
+    def schedule_snapshot_save(self, data: Callable[[], dict[str, Any]]) -> None:
+        self._snapshot_data = data
+        self.snapshot.async_delay_save(self._pending_snapshot, _SNAPSHOT_SAVE_DELAY_SEC)
+
+    def _pending_snapshot(self) -> dict[str, Any]:
+        data, self._snapshot_data = self._snapshot_data, None
+        return data() if data is not None else {}
+
+    async def async_flush(self) -> None:
+        """Scrie imediat salvările amânate (la descărcarea intrării)."""
+        if self._snapshot_data is not None:
+            await self.snapshot.async_save(self._pending_snapshot())
+        await self.history.async_flush()
+
+    async def async_remove(self) -> None:
+        # `async_remove` pe instanțele care au salvări amânate le și anulează
+        self._snapshot_data = None
+        await self.history.async_remove()
+        await self.snapshot.async_remove()
 
-def _fmt_date_ro(iso_date: str) -> str:
-    try:
-        if len(iso_date) == 7:
-            dt = datetime.strptime(iso_date + "-01", "%Y-%m-%d")
-        else:
-            dt = datetime.strptime(iso_date[:10], "%Y-%m-%d")
-        return dt.strftime("%d.%m.%Y")
-    except Exception:
-        return iso_date
+
+def _entry_stores(hass: HomeAssistant, entry_id: str) -> _EntryStores:
+    stores: dict[str, _EntryStores] = hass.data.setdefault(DATA_STORES, {})
+    if entry_id not in stores:
+        stores[entry_id] = _EntryStores(hass, entry_id)
+    return stores[entry_id]
+
+
+async def async_remove_stored_data(hass: HomeAssistant, entry_id: str) -> None:
+    """Șterge istoricul, snapshot-ul și token-ul salvate pentru o intrare eliminată."""
+    await _entry_stores(hass, entry_id).async_remove()
+    hass.data[DATA_STORES].pop(entry_id, None)
+    await async_get_token_store(hass).async_remove(entry_id)
 
 
 # ---------------------------------------------------------------------------
@@ -85,19 +130,59 @@ def _walk(d):
             yield from _walk(it)
 
 
+_EMPTY_VALUES = (None, "", [], {})
+
+
 def _find_first(payload: Any, keys: list[str]):
     for k, v in _walk(payload):
-        if k in keys and v not in (None, "", [], {}):
+        if k in keys and v not in _EMPTY_VALUES:
             return str(v)
     return None
 
 
+class _KeyIndex:
+    """First non-empty value of every key in a payload, built in a single walk.
+
+    `first(keys)` returns exactly what `_find_first(payload, keys)` would: the
+    value of whichever key comes first in `_walk` order. Use it when the same
+    payload is queried several times; one-off lookups can stay on `_find_first`,
+    which stops at the first match.
+    """
+
+    __slots__ = ("_first",)
+
+    def __init__(self, payload: Any) -> None:
+        first: dict[Any, tuple[int, Any]] = {}
+        pos = 0
+
+        def visit(node: Any) -> None:
+            nonlocal pos
+            if isinstance(node, dict):
+                for k, v in node.items():
+                    if k not in first and v not in _EMPTY_VALUES:
+                        first[k] = (pos, v)
+                    pos += 1
+                    if isinstance(v, dict | list):
+                        visit(v)
+            elif isinstance(node, list):
+                for item in node:
+                    if isinstance(item, dict | list):
+                        visit(item)
+
+        visit(payload)
+        self._first = first
+
+    def first(self, keys: Iterable[str]) -> str | None:
+        best: tuple[int, Any] | None = None
+        for k in keys:
+            hit = self._first.get(k)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        return None if best is None else str(best[1])
+
+
 def _parse_address(*payloads: Any):
-    def find(pl, names):
-        for k, v in _walk(pl):
-            if k in names and v not in (None, "", [], {}):
-                return str(v)
-        return None
+    """Format the first address found in `payloads` (raw payloads or `_KeyIndex`es)."""
 
     street_keys = ["street", "strada", "address_line1", "adresa", "address1"]
     number_keys = ["number", "nr", "numar"]
@@ -109,12 +194,13 @@ def _parse_address(*payloads: Any):
     for p in payloads:
         if not p:
             continue
-        street = find(p, street_keys)
-        number = find(p, number_keys)
-        block = find(p, block_keys)
-        apt = find(p, apt_keys)
-        city = find(p, city_keys)
-        county = find(p, county_keys)
+        index = p if isinstance(p, _KeyIndex) else _KeyIndex(p)
+        street = index.first(street_keys)
+        number = index.first(number_keys)
+        block = index.first(block_keys)
+        apt = index.first(apt_keys)
+        city = index.first(city_keys)
+        county = index.first(county_keys)
         parts = []
         if street:
             parts.append(street)
@@ -133,6 +219,80 @@ def _parse_address(*payloads: Any):
     return None
 
 
+def _format_address_value(value: Any) -> str | None:
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, Mapping):
+        inline = value.get("inline")
+        if inline:
+            return str(inline)
+        parts: list[str] = []
+        street = value.get("street")
+        number = value.get("number")
+        building = value.get("building")
+        staircase = value.get("staircase")
+        floor = value.get("floor")
+        apartment = value.get("apartment")
+        city = value.get("city")
+        if street:
+            street_part = str(street)
+            if number:
+                street_part += f" {number}"
+            parts.append(street_part)
+        if building:
+            parts.append(f"Bl. {building}")
+        if staircase:
+            parts.append(f"Sc. {staircase}")
+        if floor:
+            parts.append(f"Et. {floor}")
+        if apartment:
+            parts.append(f"Ap. {apartment}")
+        if city:
+            parts.append(str(city))
+        if parts:
+            return ", ".join(parts)
+    return str(value)
+
+
+_ADDRESS_FIELDS = ("street", "number", "floor", "apartment", "city", "district", "postcode")
+_GREENBILL_FIELDS = ("greenbill_email", "has_greenbill", "greenbill_status")
+
+
+def _place_identity(place: dict, index: _KeyIndex | None = None) -> PlaceSnapshot:
+    """The identity of a place from its node in the places list, without any slice."""
+    index = index or _KeyIndex(place)
+    contract_account = index.first(["contract_account", "contractAccount", "ca", "accountNumber"])
+    label = None
+    for key in ("address", "consumptionPlaceAddress", "name", "label", "site_name", "siteName"):
+        label = _format_address_value(place.get(key))
+        if label:
+            break
+    raw_address = place.get("address")
+    raw_contract = place.get("contract_account")
+    return PlaceSnapshot(
+        poc_number=index.first(["poc_number", "pocNumber", "poc"]),
+        contract_account=contract_account,
+        contract_account_number=(
+            index.first(["contract_account_number", "contractAccountNumber"]) or contract_account
+        ),
+        pa=index.first(["pa", "partnerAccount", "account_pa"]),
+        division=index.first(["division", "divizie"]) or "gaz",
+        label=label,
+        address_fields=(
+            {f: raw_address[f] for f in _ADDRESS_FIELDS if raw_address.get(f)}
+            if isinstance(raw_address, dict)
+            else {}
+        ),
+        contract_fields=(
+            {f: raw_contract[f] for f in _GREENBILL_FIELDS if raw_contract.get(f) is not None}
+            if isinstance(raw_contract, dict)
+            else {}
+        ),
+    )
+
+
 def _extract_places_from_raw(places_raw: Any) -> list[dict]:
     """Return all distinct consumption places (keyed by poc_number)."""
 
@@ -162,118 +322,45 @@ def _extract_places_from_raw(places_raw: Any) -> list[dict]:
 
 
 # ---------------------------------------------------------------------------
-# Per-place data fetcher
+# Per-place parsers
 # ---------------------------------------------------------------------------
 
 
-async def _fetch_place_data(
-    client: EngieClient,
-    auth: Any,
-    place: dict,
-) -> dict[str, Any]:
-    """Fetch all 7-sensor data for a single consumption place."""
-
-    poc_number = _find_first(place, ["poc_number", "pocNumber", "poc"])
-    contract_account = _find_first(
-        place, ["contract_account", "contractAccount", "ca", "accountNumber"]
-    )
-    contract_account_number = _find_first(
-        place, ["contract_account_number", "contractAccountNumber"]
-    )
-    pa = _find_first(place, ["pa", "partnerAccount", "account_pa"])
-    division = _find_first(place, ["division", "divizie"]) or "gaz"
-
-    result: dict[str, Any] = {
-        "poc_number": poc_number,
-        "contract_account": contract_account,
-        "contract_account_number": contract_account_number or contract_account,
-        "pa": pa,
-        "division": division,
-        "address": None,
-        "index_info": None,
-        "installation_number": None,
-        "invoices_details": None,
-        "unpaid_list": [],
-        "unpaid_last_value": None,
-        "unpaid_total": 0.0,
-        "unpaid_items": [],
-        "inv_hist": {},
-        "invoices_flat": [],
-        "invoices_year_current": [],
-        "invoices_year_prev": [],
-        "consumption_by_month": {},
-        "consumption_count": 0,
-        "consumption_total": 0.0,
-        "index_history_last": None,
-        "index_history_by_month": {},
-    }
-
-    if not poc_number:
-        return result
-
-    # --- Divisions / address ---
-    divisions_payload = None
+def _parse_date_loose(d: str) -> datetime:
     try:
-        divisions_payload = await client.get_divisions(poc_number, pa=pa)
-    except EngieUnauthorized:
-        await auth.refresh_after_401()
-        try:
-            divisions_payload = await client.get_divisions(poc_number, pa=pa)
-        except Exception as e:
-            _LOGGER.debug("Divisions fetch failed for %s: %s", poc_number, e)
-    except Exception as e:
-        _LOGGER.debug("Divisions fetch failed for %s: %s", poc_number, e)
+        if len(d) == 7:
+            return datetime.strptime(d + "-01", "%Y-%m-%d")
+        return datetime.strptime(d[:10], "%Y-%m-%d")
+    except Exception:
+        return datetime.min
 
-    result["address"] = _parse_address(place, divisions_payload)
 
-    # --- Index window ---
+def _parse_index_window(idx_payload: Any) -> tuple[Reading | None, str | None]:
+    """Return (reading, installation_number) from the /v1/index payload."""
     index_info = None
     installation_number = None
-    try:
-        idx_payload = await client.get_index_window(
-            poc_number, division=division, pa=pa, installation_number=None
-        )
-        if isinstance(idx_payload, dict):
-            data_list = idx_payload.get("data") or []
-            if isinstance(data_list, list) and data_list:
-                insts = data_list[0].get("installations") or []
-                if insts:
-                    inst = insts[0]
-                    dates = inst.get("next_read_dates") or {}
-                    index_info = {
-                        "last_index": inst.get("last_index"),
-                        "autocit": inst.get("autocit"),
-                        "permite_index": inst.get("permite_index"),
-                        "start_date": dates.get("startDate"),
-                        "end_date": dates.get("endDate"),
-                    }
-                    installation_number = inst.get("installation_number") or inst.get(
-                        "installationNumber"
-                    )
-    except EngieUnauthorized:
-        await auth.refresh_after_401()
-    except Exception as e:
-        _LOGGER.debug("Index window fetch failed for %s: %s", poc_number, e)
-
-    result["index_info"] = index_info
-    result["installation_number"] = installation_number
-
-    # --- Invoices details (unpaid) ---
-    invoices_details = None
+    if isinstance(idx_payload, dict):
+        data_list = idx_payload.get("data") or []
+        if isinstance(data_list, list) and data_list:
+            insts = data_list[0].get("installations") or []
+            if insts:
+                inst = insts[0]
+                dates = inst.get("next_read_dates") or {}
+                index_info = Reading(
+                    last_index=inst.get("last_index"),
+                    autocit=inst.get("autocit"),
+                    permite_index=inst.get("permite_index"),
+                    start_date=dates.get("startDate"),
+                    end_date=dates.get("endDate"),
+                )
+                installation_number = inst.get("installation_number") or inst.get(
+                    "installationNumber"
+                )
+    return index_info, installation_number
+
+
+def _parse_unpaid(invoices_details: Any, poc_number: str) -> dict[str, Any]:
     unpaid_list: list = []
-    ca_for_balance = contract_account_number or contract_account
-    if ca_for_balance:
-        try:
-            invoices_details = await client.get_invoices_details(ca_for_balance)
-        except EngieUnauthorized:
-            await auth.refresh_after_401()
-            try:
-                invoices_details = await client.get_invoices_details(ca_for_balance)
-            except Exception as e:
-                _LOGGER.debug("Invoices details fetch failed for %s: %s", poc_number, e)
-        except Exception as e:
-            _LOGGER.debug("Invoices details fetch failed for %s: %s", poc_number, e)
-
     unpaid_last_value = None
     unpaid_total = 0.0
     unpaid_items: list = []
@@ -294,12 +381,12 @@ async def _fetch_place_data(
                             if upf > 0:
                                 unpaid_total += upf
                                 unpaid_items.append(
-                                    {
-                                        "invoice_number": inv.get("invoice_number"),
-                                        "unpaid": inv.get("unpaid"),
-                                        "due_date": inv.get("due_date"),
-                                        "total": inv.get("total"),
-                                    }
+                                    Invoice(
+                                        invoice_number=inv.get("invoice_number"),
+                                        unpaid=inv.get("unpaid"),
+                                        due_date=inv.get("due_date"),
+                                        total=inv.get("total"),
+                                    )
                                 )
             except Exception as e:
                 _LOGGER.debug("Parse invoices unpaid failed for %s: %s", poc_number, e)
@@ -322,36 +409,17 @@ async def _fetch_place_data(
     except Exception as e:
         _LOGGER.debug("Parse unpaid list failed for %s: %s", poc_number, e)
 
-    result["invoices_details"] = invoices_details
-    result["unpaid_list"] = unpaid_list
-    result["unpaid_last_value"] = unpaid_last_value
-    result["unpaid_total"] = unpaid_total
-    result["unpaid_items"] = unpaid_items
-
-    # --- Dates for history queries ---
-    today = datetime.now().date()
-    end_date = today.strftime("%Y-%m-%d")
-    start_date = (today - timedelta(days=365)).strftime("%Y-%m-%d")
-
-    # --- Invoices history (arhivă facturi) ---
-    inv_hist: dict = {}
-    if pa:
-        try:
-            inv_hist = await client.get_invoices_history(
-                poc_number=str(poc_number),
-                start_date=start_date,
-                end_date=end_date,
-                pa=str(pa),
-            )
-        except EngieUnauthorized:
-            await auth.refresh_after_401()
-        except Exception as e:
-            _LOGGER.debug("Invoices history fetch failed for %s: %s", poc_number, e)
+    return {
+        "pending": tuple(unpaid_list),
+        "unpaid_last_value": unpaid_last_value,
+        "unpaid_total": unpaid_total,
+        "unpaid_items": tuple(unpaid_items),
+    }
 
-    result["inv_hist"] = inv_hist
 
-    # --- Invoices flat (for year buckets) ---
-    invoices_flat: list[dict] = []
+def _parse_invoices_history(inv_hist: Any, poc_number: str) -> dict[str, Any]:
+    """Flatten the monthly invoice archive; per-year views are derived in model.py."""
+    invoices_flat: list[Invoice] = []
     try:
         if isinstance(inv_hist, dict):
             data = inv_hist.get("data") or []
@@ -361,238 +429,861 @@ async def _fetch_place_data(
                     for it in invs2:
                         if isinstance(it, dict):
                             invoices_flat.append(
-                                {
-                                    "month": m.get("invoiced_at"),
-                                    "invoice_number": it.get("invoice_number"),
-                                    "division": it.get("division"),
-                                    "invoiced_at": it.get("invoiced_at"),
-                                    "consum_gaz": it.get("consum_gaz"),
-                                    "consum_elec": it.get("consum_elec"),
-                                }
+                                Invoice(
+                                    month=m.get("invoiced_at"),
+                                    invoice_number=it.get("invoice_number"),
+                                    division=it.get("division"),
+                                    invoiced_at=it.get("invoiced_at"),
+                                    consum_gaz=it.get("consum_gaz"),
+                                    consum_elec=it.get("consum_elec"),
+                                )
                             )
     except Exception as e:
         _LOGGER.debug("Invoices flat parse failed for %s: %s", poc_number, e)
 
-    invoices_year_current: list[dict] = []
-    invoices_year_prev: list[dict] = []
-    now_year = datetime.now().year
-    for it in invoices_flat:
-        m = (it.get("month") or "")[:7]
-        y = int(m.split("-")[0]) if "-" in m else None
-        if y == now_year:
-            invoices_year_current.append(it)
-        elif y == now_year - 1:
-            invoices_year_prev.append(it)
-    invoices_year_current.sort(key=lambda x: str(x.get("month")))
-    invoices_year_prev.sort(key=lambda x: str(x.get("month")))
-
-    result["invoices_flat"] = invoices_flat
-    result["invoices_year_current"] = invoices_year_current
-    result["invoices_year_prev"] = invoices_year_prev
-
-    # --- Consumption (pentru sensor Arhivă facturi) ---
-    # Produce a clean dict: { "ianuarie 2025": "370,93 lei", ... } sorted newest-first
-    consumption_by_month: dict[str, str] = {}
-    consumption_count = 0
-    consumption_total = 0.0
-    if pa:
-        try:
-            cons = await client.get_consumption(poc_number, start_date, end_date, pa=pa)
-            items: list[tuple[str, float]] = []
-            if isinstance(cons, dict):
-                arr = cons.get("data") or []
-                for month_item in arr:
-                    invs3 = month_item.get("invoice_numbers") or []
-                    for inv in invs3:
-                        d = str(inv.get("invoiced_at") or month_item.get("invoiced_at") or "")
-                        amount = inv.get("consum_gaz") or inv.get("value") or inv.get("amount") or 0
-                        try:
-                            amount_num = float(str(amount).replace(",", "."))
-                        except Exception:
-                            amount_num = 0.0
-                        items.append((d, amount_num))
-
-            def _parse_date(d: str) -> datetime:
+    return {"invoices": tuple(invoices_flat)}
+
+
+def _consumption_entries(cons: Any) -> list[tuple[str, str, float]]:
+    """Return `(key, date, amount)` per paid invoice from the consumption payload."""
+    items: list[tuple[str, str, float]] = []
+    if isinstance(cons, dict):
+        arr = cons.get("data") or []
+        for month_item in arr:
+            invs3 = month_item.get("invoice_numbers") or []
+            for inv in invs3:
+                d = str(inv.get("invoiced_at") or month_item.get("invoiced_at") or "")
+                amount = inv.get("consum_gaz") or inv.get("value") or inv.get("amount") or 0
+                try:
+                    amount_num = float(str(amount).replace(",", "."))
+                except Exception:
+                    amount_num = 0.0
+                key = str(inv.get("invoice_number") or f"{d}|{amount_num}")
+                items.append((key, d, amount_num))
+    return items
+
+
+def _summarize_consumption(entries: Iterable[tuple[str, float]]) -> dict[str, Any]:
+    """Build the payments series; entries without a usable date are skipped."""
+    points = []
+    for d, v in entries:
+        dt = _parse_date_loose(d)
+        if dt != datetime.min:
+            points.append((dt.date(), v))
+    return {"consumption": TimeSeries.from_points(points)}
+
+
+def _parse_consumption(cons: Any) -> dict[str, Any]:
+    return _summarize_consumption((d, v) for _, d, v in _consumption_entries(cons))
+
+
+def _index_readings(hist: Any) -> list[tuple[str, int]]:
+    """Return `(YYYY-MM-DD, index)` for every valid reading in the history payload."""
+    entries: list[tuple[str, int]] = []
+    if isinstance(hist, dict):
+        d = hist.get("data") or {}
+        arr = d.get("istoric_citiri") or []
+        for it in arr:
+            date_str = str(it.get("data") or "")
+            idx_val = it.get("index")
+            try:
+                idx_num = int(str(idx_val))
+            except Exception:
                 try:
-                    if len(d) == 7:
-                        return datetime.strptime(d + "-01", "%Y-%m-%d")
-                    return datetime.strptime(d[:10], "%Y-%m-%d")
+                    idx_num = int(float(str(idx_val).replace(",", ".")))
                 except Exception:
-                    return datetime.min
-
-            items.sort(key=lambda x: _parse_date(x[0]), reverse=True)
-            consumption_count = len(items)
-            for d, v in items:
-                consumption_total += v
-                dt = _parse_date(d)
-                if dt != datetime.min:
-                    label = f"{_RO_MONTHS[dt.month]} {dt.year}"
-                else:
-                    label = _fmt_date_ro(d)
-                consumption_by_month[label] = _fmt_money_lei(v)
+                    idx_num = None
+            try:
+                datetime.strptime(date_str, "%Y-%m-%d")
+            except Exception:
+                continue
+            if idx_num is not None:
+                entries.append((date_str, idx_num))
+    return entries
+
+
+def _summarize_index_history(readings: Iterable[tuple[str, int]]) -> dict[str, Any]:
+    """Build the index readings series (month labels are derived in model.py)."""
+    return {"readings": TimeSeries.from_points((date.fromisoformat(d), idx) for d, idx in readings)}
+
+
+def _parse_index_history(hist: Any) -> dict[str, Any]:
+    return _summarize_index_history(_index_readings(hist))
+
+
+def _place_contract_account(place: dict | _KeyIndex) -> str | None:
+    """Contul contract folosit pentru sold / facturi restante."""
+    index = place if isinstance(place, _KeyIndex) else _KeyIndex(place)
+    return index.first(["contract_account_number", "contractAccountNumber"]) or index.first(
+        ["contract_account", "contractAccount", "ca", "accountNumber"]
+    )
+
+
+_CA_KEYS = [
+    "contract_account",
+    "contractAccount",
+    "contract_account_number",
+    "contractAccountNumber",
+    "ca",
+]
+
+
+def _norm_ca(value: Any) -> str:
+    return str(value).strip().lstrip("0")
+
+
+def _split_invoices_details(payload: Any, accounts: list[str]) -> dict[str, Any] | None:
+    """Împarte un răspuns batch `ballance-details` pe conturi contract.
+
+    Întoarce `{cont: payload_individual}` pentru toate conturile cerute; un cont
+    care lipsește dintr-un răspuns atribuibil nu are facturi. Întoarce None dacă
+    un element nu poate fi atribuit unuia dintre conturile cerute.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("data"), dict):
+        return None
+    data = payload["data"]
+    by_norm = {_norm_ca(ca): ca for ca in accounts}
+
+    def _owner(node: Any) -> str | None:
+        if len(accounts) == 1:
+            return accounts[0]
+        found = _find_first(node, _CA_KEYS)
+        return by_norm.get(_norm_ca(found)) if found else None
+
+    invoices: dict[str, list] = {}
+    for acc in data.get("invoices") or []:
+        owner = _owner(acc)
+        if owner is None:
+            return None
+        invoices.setdefault(owner, []).append(acc)
+
+    pending: dict[str, list] = {}
+    for item in data.get("pending") or []:
+        owner = _owner(item)
+        if owner is None:
+            return None
+        pending.setdefault(owner, []).append(item)
+
+    return {
+        ca: {
+            **payload,
+            "data": {**data, "invoices": invoices.get(ca, []), "pending": pending.get(ca, [])},
+        }
+        for ca in accounts
+    }
+
+
+# ---------------------------------------------------------------------------
+# Per-place data fetcher
+# ---------------------------------------------------------------------------
+
+
+async def _run_task_graph(
+    nodes: dict[str, tuple[tuple[str, ...], Callable[..., Awaitable[Any]]]],
+    timed_out: Any = None,
+) -> dict[str, Any]:
+    """Run `name -> (deps, fn)` nodes, each as soon as its dependencies resolve.
+
+    `fn` receives the results of its dependencies as keyword arguments. The
+    first node that raises cancels the rest and the error is propagated.
+    Under a `request_deadline`, a node still running shortly after the deadline
+    is cancelled and yields `timed_out`; nodes that finished keep their results.
+    """
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def _run(name: str, deps: tuple[str, ...], fn: Callable[..., Awaitable[Any]]) -> Any:
+        kwargs = {dep: await tasks[dep] for dep in deps}
+        remaining = deadline_remaining()
+        if remaining is None:
+            return await fn(**kwargs)
+        # Plasa de siguranță pentru cererile care nu respectă termenul (de ex. una
+        # preluată prin SingleFlight cu termenul altui apelant)
+        try:
+            async with asyncio.timeout(remaining + _DEADLINE_GRACE_SEC) as timeout:
+                return await fn(**kwargs)
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            _LOGGER.debug("Engie: %s a depășit termenul refresh-ului", name)
+            return timed_out
+
+    for name, (deps, fn) in nodes.items():
+        tasks[name] = asyncio.create_task(_run(name, deps, fn), name=f"engie_ro:{name}")
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return {name: task.result() for name, task in tasks.items()}
+
+
+# Marks a node whose request failed, as opposed to a legitimately empty answer
+_FAILED = object()
+
+# What a failed slice contributes when there is no cached value to keep
+_FAILED_VALUE: dict[str, Any] = {
+    tiers.DIVISIONS: None,
+    tiers.INDEX_WINDOW: (None, None),
+    tiers.UNPAID: None,
+    tiers.INVOICES_HISTORY: {},
+    tiers.CONSUMPTION: None,
+    tiers.INDEX_HISTORY: None,
+}
+
+
+def _has_slice(data: PlaceSnapshot | None, name: str) -> bool:
+    return data is not None and data.has(name)
+
+
+def _apply_slice(
+    result: PlaceSnapshot,
+    name: str,
+    value: Any,
+    place: dict | _KeyIndex,
+    keep_raw: bool = False,
+) -> None:
+    """Write the parsed fields of one data class into the place result."""
+    poc_number = result.poc_number
+    if name == tiers.DIVISIONS:
+        result.set_slice(name, {"address": _parse_address(place, value)})
+    elif name == tiers.INDEX_WINDOW:
+        reading, installation_number = value
+        result.set_slice(name, {"reading": reading, "installation_number": installation_number})
+    elif name == tiers.UNPAID:
+        parsed = _parse_unpaid(value, poc_number)
+        parsed["raw_invoices_details"] = value if keep_raw else None
+        result.set_slice(name, parsed)
+    elif name == tiers.INVOICES_HISTORY:
+        parsed = _parse_invoices_history(value, poc_number)
+        parsed["raw_invoices_history"] = value if keep_raw else None
+        result.set_slice(name, parsed)
+    elif name == tiers.CONSUMPTION:
+        result.set_slice(name, value or _parse_consumption(None))
+    elif name == tiers.INDEX_HISTORY:
+        result.set_slice(name, value or _parse_index_history(None))
+
+
+async def _fetch_place_data(
+    client: EngieClient,
+    auth: Any,
+    place: dict,
+    invoices_details_payload: Any = None,
+    *,
+    slices: Collection[str] = tiers.PLACE_SLICES,
+    previous: PlaceSnapshot | None = None,
+    history: PlaceHistory | None = None,
+    keep_raw: bool = False,
+    place_index: _KeyIndex | None = None,
+) -> tuple[PlaceSnapshot, set[str]]:
+    """Fetch the requested data classes for a single consumption place.
+
+    The endpoints are independent except the index history, which needs the
+    `autocit` flag from the index window, so they run as a small task graph.
+    `invoices_details_payload` is this place's slice of a batch request, if any.
+    Classes not in `slices`, or whose request failed, keep their value from
+    `previous`. With a `history`, the consumption and index series are fetched
+    incrementally and summarized from the persisted store instead of the
+    response alone. Raw payloads are kept on the result only with `keep_raw`.
+    `place_index` is the caller's cached index of `place`, if it has one.
+    Returns the merged result and the set of classes fetched now.
+    """
+
+    # One walk of the place payload serves every key lookup below
+    place_index = place_index or _KeyIndex(place)
+    result = _place_identity(place, place_index)
+    poc_number = result.poc_number
+    pa = result.pa
+    division = result.division
+
+    if not poc_number:
+        return result, set()
+
+    result.take(previous, SLICE_FIELDS)
+
+    # --- Dates for history queries ---
+    today = datetime.now().date()
+    end_date = today.strftime("%Y-%m-%d")
+    start_day = today - timedelta(days=CONSUMPTION_WINDOW_DAYS)
+    start_date = start_day.strftime("%Y-%m-%d")
+    start_day_hist = today - timedelta(days=INDEX_HISTORY_WINDOW_DAYS)
+    ca_for_balance = result.contract_account_number
+
+    async def divisions() -> Any:
+        try:
+            return await auth.call_with_reauth(lambda: client.get_divisions(poc_number, pa=pa))
         except Exception as e:
-            _LOGGER.debug("Failed to build consumption for %s: %s", poc_number, e)
+            _LOGGER.debug("Divisions fetch failed for %s: %s", poc_number, e)
+        return _FAILED
 
-    result["consumption_by_month"] = consumption_by_month
-    result["consumption_count"] = consumption_count
-    result["consumption_total"] = round(consumption_total, 2)
+    async def index_window() -> Any:
+        try:
+            idx_payload = await auth.call_with_reauth(
+                lambda: client.get_index_window(
+                    poc_number, division=division, pa=pa, installation_number=None
+                )
+            )
+            return _parse_index_window(idx_payload)
+        except Exception as e:
+            _LOGGER.debug("Index window fetch failed for %s: %s", poc_number, e)
+        return _FAILED
+
+    async def unpaid() -> Any:
+        if invoices_details_payload is not None:
+            return invoices_details_payload
+        if not ca_for_balance:
+            return None
+        try:
+            return await auth.call_with_reauth(lambda: client.get_invoices_details(ca_for_balance))
+        except Exception as e:
+            _LOGGER.debug("Invoices details fetch failed for %s: %s", poc_number, e)
+        return _FAILED
 
-    # --- Index history (Ultimul index din istoric) ---
-    # Produce clean dict: { "martie 2026": 437, "februarie 2026": 340, ... } newest first
-    index_history_by_month: dict[str, int] = {}
-    index_history_last = None
-    if index_info:
+    async def invoices_history() -> Any:
+        if not pa:
+            return {}
         try:
-            start_date_hist = (today - timedelta(days=3 * 365)).strftime("%Y-%m-%d")
-            autocit_val = (index_info or {}).get("autocit") or ""
-            hist = await client.get_index_history_post(
-                autocit=str(autocit_val),
-                poc_number=str(poc_number),
-                division=str(division),
-                start_date=start_date_hist,
+            return await auth.call_with_reauth(
+                lambda: client.get_invoices_history(
+                    poc_number=str(poc_number),
+                    start_date=start_date,
+                    end_date=end_date,
+                    pa=str(pa),
+                )
             )
-            latest_date = None
-            latest_index = None
-            entries: list[tuple] = []
-            if isinstance(hist, dict):
-                d = hist.get("data") or {}
-                arr = d.get("istoric_citiri") or []
-                for it in arr:
-                    date_str = str(it.get("data") or "")
-                    idx_val = it.get("index")
-                    try:
-                        idx_num = int(str(idx_val))
-                    except Exception:
-                        try:
-                            idx_num = int(float(str(idx_val).replace(",", ".")))
-                        except Exception:
-                            idx_num = None
-                    try:
-                        dt = datetime.strptime(date_str, "%Y-%m-%d")
-                    except Exception:
-                        dt = None
-                    if dt and idx_num is not None:
-                        entries.append((dt, idx_num))
-                        if latest_date is None or dt > latest_date:
-                            latest_date = dt
-                            latest_index = idx_num
-            entries.sort(key=lambda x: x[0], reverse=True)
-            for dt, idx_num in entries:
-                label = f"{_RO_MONTHS[dt.month]} {dt.year}"
-                if label not in index_history_by_month:
-                    index_history_by_month[label] = idx_num
-            if latest_index is not None:
-                index_history_last = latest_index
         except Exception as e:
-            _LOGGER.debug("Failed to build index history for %s: %s", poc_number, e)
+            _LOGGER.debug("Invoices history fetch failed for %s: %s", poc_number, e)
+        return _FAILED
+
+    async def consumption() -> Any:
+        if not pa:
+            return None
+        try:
+            if history is None:
+                cons = await auth.call_with_reauth(
+                    lambda: client.get_consumption(poc_number, start_date, end_date, pa=pa)
+                )
+                return _parse_consumption(cons)
+            cons_start = history.window_start(HISTORY_CONSUMPTION, start_day)
+            cons = await auth.call_with_reauth(
+                lambda: client.get_consumption(poc_number, cons_start, end_date, pa=pa)
+            )
+            history.merge_consumption(_consumption_entries(cons), cons_start)
+            return _summarize_consumption((d, v) for d, v in history.consumption.values())
+        except Exception as e:
+            _LOGGER.debug("Failed to build consumption for %s: %s", poc_number, e)
+        return _FAILED
 
-    result["index_history_last"] = index_history_last
-    result["index_history_by_month"] = index_history_by_month
+    async def index_history(index_window: Any = _FAILED) -> Any:
+        # Fereastra de citire din acest refresh, altfel cea din cache
+        reading = index_window[0] if index_window is not _FAILED else result.reading
+        if not reading:
+            return None
+        try:
+            autocit_val = reading.autocit or ""
+            hist_start = (
+                history.window_start(HISTORY_READINGS, start_day_hist)
+                if history is not None
+                else start_day_hist.strftime("%Y-%m-%d")
+            )
+            hist = await auth.call_with_reauth(
+                lambda: client.get_index_history_post(
+                    autocit=str(autocit_val),
+                    poc_number=str(poc_number),
+                    division=str(division),
+                    start_date=hist_start,
+                )
+            )
+            if history is None:
+                return _parse_index_history(hist)
+            history.merge_readings(_index_readings(hist), hist_start)
+            return _summarize_index_history(history.readings.items())
+        except Exception as e:
+            _LOGGER.debug("Failed to build index history for %s: %s", poc_number, e)
+        return _FAILED
+
+    graph: dict[str, tuple[tuple[str, ...], Callable[..., Awaitable[Any]]]] = {
+        tiers.DIVISIONS: ((), divisions),
+        tiers.INDEX_WINDOW: ((), index_window),
+        tiers.UNPAID: ((), unpaid),
+        tiers.INVOICES_HISTORY: ((), invoices_history),
+        tiers.CONSUMPTION: ((), consumption),
+        tiers.INDEX_HISTORY: (
+            (tiers.INDEX_WINDOW,) if tiers.INDEX_WINDOW in slices else (),
+            index_history,
+        ),
+    }
+    done = await _run_task_graph(
+        {name: node for name, node in graph.items() if name in slices}, timed_out=_FAILED
+    )
 
+    fresh: set[str] = set()
+    for name, value in done.items():
+        if value is not _FAILED:
+            _apply_slice(result, name, value, place_index, keep_raw)
+            fresh.add(name)
+        elif not _has_slice(previous, name):
+            _apply_slice(result, name, _FAILED_VALUE[name], place_index)
+    # Classes left for another phase get a placeholder until they are fetched
+    for name in SLICE_FIELDS:
+        if name not in done and not _has_slice(previous, name):
+            _apply_slice(result, name, _FAILED_VALUE[name], place_index)
+
+    return result, fresh
+
+
+def _merge_place(
+    current: PlaceSnapshot | None, result: PlaceSnapshot, fresh: set[str]
+) -> PlaceSnapshot:
+    """Overlay a fetch result on the current place state.
+
+    Classes fetched now come from `result`; every other class keeps the value
+    in `current`, which another phase may have updated while `result` was
+    being fetched.
+    """
+    if current is None:
+        return result
+    result.take(current, (name for name in SLICE_FIELDS if name not in fresh))
+    result.stale = current.stale
     return result
 
 
+def _build_data(
+    profile: Profile | None,
+    places_data: dict[str, PlaceSnapshot],
+    raw: dict[str, Any] | None = None,
+) -> EngieData:
+    """Assemble `coordinator.data` from the profile and per-place results."""
+    now_iso = datetime.now(UTC).astimezone().isoformat(timespec="seconds")
+    return EngieData(profile or Profile(), places_data, now_iso, raw)
+
+
 # ---------------------------------------------------------------------------
 # Coordinator
 # ---------------------------------------------------------------------------
 
 
-class EngieDataCoordinator(DataUpdateCoordinator[dict[str, Any]]):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+class EngieDataCoordinator(DataUpdateCoordinator[EngieData]):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, transport: EngieTransport):
         super().__init__(
             hass,
             _LOGGER,
             name="Engie România",
-            update_interval=timedelta(seconds=UPDATE_INTERVAL_SEC),
+            # Refresh-urile periodice sunt declanșate de scheduler.py, eșalonat
+            update_interval=None,
         )
         self.entry = entry
         base_url = entry.data.get(CONF_BASE_URL, DEFAULT_BASE_URL)
         username = entry.data.get(CONF_USERNAME)
         password = entry.data.get(CONF_PASSWORD)
+        # Fișierul de token de migrat al versiunilor anterioare: cele mai vechi nu
+        # salvau calea și foloseau fișierul implicit; intrările noi au calea goală
         token_file = entry.data.get(CONF_TOKEN_FILE, DEFAULT_TOKEN_FILE)
         device_id = entry.data.get(CONF_DEVICE_ID) or "ha-device"
         auth_mode = entry.data.get(CONF_AUTH_MODE) or AUTH_MODE_MOBILE
         bearer_token = entry.data.get(CONF_BEARER_TOKEN)
-
-        self.client = EngieClient(base_url=base_url)
+        try:
+            max_places = int(
+                entry.data.get(CONF_MAX_CONCURRENT_PLACES) or DEFAULT_MAX_CONCURRENT_PLACES
+            )
+        except (TypeError, ValueError):
+            max_places = DEFAULT_MAX_CONCURRENT_PLACES
+        self._max_concurrent_places = max(1, max_places)
+        try:
+            batch_size = int(
+                entry.data.get(CONF_INVOICES_BATCH_SIZE) or DEFAULT_INVOICES_BATCH_SIZE
+            )
+        except (TypeError, ValueError):
+            batch_size = DEFAULT_INVOICES_BATCH_SIZE
+        self._invoices_batch_size = max(1, batch_size)
+        # Depanare: păstrează și payload-urile brute în `coordinator.data`
+        self._keep_raw = bool(entry.data.get(CONF_KEEP_RAW_PAYLOADS))
+        try:
+            rate = float(entry.data.get(CONF_RATE_LIMIT_RPS) or DEFAULT_RATE_LIMIT_RPS)
+            burst = int(entry.data.get(CONF_RATE_LIMIT_BURST) or DEFAULT_RATE_LIMIT_BURST)
+        except (TypeError, ValueError):
+            rate, burst = DEFAULT_RATE_LIMIT_RPS, DEFAULT_RATE_LIMIT_BURST
+
+        self.transport = transport
+        transport.set_rate_limit(entry.entry_id, rate, burst)
+        self._tiers = tiers.RefreshTiers()
+        self._stores = _entry_stores(hass, entry.entry_id)
+        self._history = self._stores.history
+        # Profilul, nodurile locurilor din lista de locuri (intrarea cererilor) și
+        # starea curentă pe loc de consum, actualizată de ambele faze ale refresh-ului
+        self._profile: Profile | None = None
+        self._jobs: dict[str, dict] = {}
+        # Indexul cheilor fiecărui loc din `_jobs`, construit o dată pe listă de locuri
+        self._indexes: dict[str, _KeyIndex] = {}
+        self._places: dict[str, PlaceSnapshot] = {}
+        self._raw_account: dict[str, Any] | None = None
+        self._enrich_task: asyncio.Task | None = None
+        self._renew_task: asyncio.Task | None = None
+        self.metrics = RefreshMetrics()
+        self.client = EngieClient(
+            base_url=base_url,
+            session=transport.session,
+            form_variants=transport.form_variants,
+            breakers=transport.breakers,
+            single_flight=transport.single_flight,
+            rate_limiter=transport.rate_limiter,
+            metrics=transport.metrics,
+        )
         self.auth = EngieAuthManager(
-            self.client, username, password, token_file, device_id, auth_mode, bearer_token
+            self.client,
+            username,
+            password,
+            token_file,
+            device_id,
+            auth_mode,
+            bearer_token,
+            token_store=async_get_token_store(hass),
+            store_key=entry.entry_id,
         )
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        try:
-            await self.auth.ensure_valid_token()
-
-            me = await self.client.get_user()
-            places_raw = await self.client.get_places()
+    async def async_restore_snapshot(self) -> bool:
+        """Publică ultimul snapshot salvat, fără niciun apel de rețea.
 
-            profile = {
-                "email": (me.get("data") or {}).get("email") if isinstance(me, dict) else None,
-                "name": (me.get("data") or {}).get("user_name") if isinstance(me, dict) else None,
-                "phone": (me.get("data") or {}).get("phone") if isinstance(me, dict) else None,
-            }
+        Întoarce True dacă a existat un snapshot; entitățile pot fi create din el,
+        iar refresh-ul de rețea poate rula în fundal.
+        """
+        try:
+            stored = await self._stores.snapshot.async_load()
+        except Exception as e:
+            _LOGGER.debug("Engie: nu pot citi snapshot-ul salvat: %s", e)
+            return False
+        if not isinstance(stored, dict) or not isinstance(stored.get("data"), dict):
+            return False
+        try:
+            data = EngieData.from_dict(stored["data"])
+        except (TypeError, ValueError) as e:
+            _LOGGER.debug("Engie: snapshot-ul salvat nu poate fi citit: %s", e)
+            return False
+        self._tiers.restore(stored.get("tiers") or {})
+        self._profile = data.profile
+        self._jobs = {
+            str(poc): place
+            for poc, place in (stored.get("jobs") or {}).items()
+            if isinstance(place, dict)
+        }
+        self._indexes.clear()
+        self._places = dict(data.places)
+        if self._keep_raw:
+            self._raw_account = data.raw
+        else:
+            data.raw = None
+        self.async_set_updated_data(data)
+        _LOGGER.debug("Engie: pornesc din snapshot-ul din %s", data.last_update or "?")
+        return True
+
+    def _schedule_snapshot_save(self, data: EngieData) -> None:
+        self._stores.schedule_snapshot_save(
+            lambda: {"data": data.as_dict(), "jobs": self._jobs, "tiers": self._tiers.as_dict()}
+        )
 
-            now_iso = datetime.now(UTC).astimezone().isoformat(timespec="seconds")
+    def _place_index(self, poc: str, place: dict) -> _KeyIndex:
+        index = self._indexes.get(poc)
+        if index is None:
+            index = self._indexes[poc] = _KeyIndex(place)
+        return index
+
+    async def _fetch_invoices_details_batched(
+        self, places: list[_KeyIndex], sem: asyncio.Semaphore
+    ) -> dict[str, Any]:
+        """Cere `ballance-details` pentru mai multe conturi într-un singur POST.
+
+        Conturile sunt grupate câte `_invoices_batch_size`; un lot care eșuează lasă
+        acele locuri să facă cererea individuală, doar la acest refresh. Un răspuns
+        care identifică mai puțin de două conturi (de ex. nimic de plată) nu spune
+        dacă gateway-ul a ignorat restul: se revine la cereri individuale fără a
+        socoti un eșec. Loturile respinse (4xx) sau neatribuibile sunt raportate
+        clientului, care oprește batch-ul doar dacă se repetă.
+        """
+        accounts = list(dict.fromkeys(filter(None, map(_place_contract_account, places))))
+        size = self._invoices_batch_size
+        if size < 2 or len(accounts) < 2:
+            return {}
+
+        async def _chunk(chunk: list[str]) -> dict[str, Any]:
+            async with sem:
+                try:
+                    payload = await self.auth.call_with_reauth(
+                        lambda: self.client.get_invoices_details_batch(chunk)
+                    )
+                except EngieNotSupported:
+                    return {}
+                except (
+                    EngieRetryableError,
+                    EngieUnauthorized,
+                    EngieDeadlineExceeded,
+                    EngieCircuitOpen,
+                ) as e:
+                    _LOGGER.debug("Batch invoices details failed for %s: %s", chunk, e)
+                    return {}
+                except EngieHTTPError as e:
+                    _LOGGER.debug("Batch invoices details rejected for %s: %s", chunk, e)
+                    self.client.invoices_batch_failed()
+                    return {}
+                except Exception as e:
+                    _LOGGER.debug("Batch invoices details failed for %s: %s", chunk, e)
+                    return {}
+            split = _split_invoices_details(payload, chunk)
+            if split is None:
+                _LOGGER.debug("Batch invoices details for %s cannot be attributed", chunk)
+                self.client.invoices_batch_failed()
+                return {}
+            named = sum(1 for p in split.values() if p["data"]["invoices"] or p["data"]["pending"])
+            if len(chunk) > 1 and named < 2:
+                return {}
+            self.client.invoices_batch_succeeded()
+            return split
+
+        chunks = [accounts[i : i + size] for i in range(0, len(accounts), size)]
+        merged: dict[str, Any] = {}
+        for part in await asyncio.gather(*(_chunk(c) for c in chunks)):
+            merged.update(part)
+        return merged
+
+    async def _fetch_all_places(
+        self, jobs: dict[str, dict], now: float, slices: Collection[str], phase: str
+    ) -> None:
+        """Fetch `slices` for every place concurrently into `self._places`.
+
+        At most `_max_concurrent_places` places are in flight. Only the data
+        classes that are due (see tiers.py) are requested; the rest keep their
+        cached value. A place that fails keeps its cached data (or gets a stub
+        entry) and does not affect the others.
+
+        Everything still in flight when the refresh deadline (see
+        `request_deadline`) passes is cancelled. Due slices that did not come
+        back fresh are listed in the place's `stale` key until a later refresh
+        succeeds.
+        """
+        due = {poc: self._tiers.due_slices(poc, now).intersection(slices) for poc in jobs}
+
+        sem = asyncio.Semaphore(self._max_concurrent_places)
+        indexes = {poc: self._place_index(poc, place) for poc, place in jobs.items()}
+        details = await self._fetch_invoices_details_batched(
+            [indexes[poc] for poc in jobs if tiers.UNPAID in due[poc]], sem
+        )
 
-            # Extract all places with poc_number
-            places_list = _extract_places_from_raw(places_raw)
+        fresh_by_poc: dict[str, set[str]] = {}
 
-            # Fetch full data for every place
-            places_data: dict[str, dict] = {}
-            for place in places_list:
-                poc = _find_first(place, ["poc_number", "pocNumber", "poc"])
-                if not poc:
-                    continue
+        async def _one(poc: str, place: dict) -> None:
+            previous = self._places.get(poc)
+            if previous and not due[poc]:
+                return
+            async with sem:
+                started = time.monotonic()
                 try:
-                    place_result = await _fetch_place_data(self.client, self.auth, place)
-                    places_data[poc] = place_result
+                    result, fresh = await _fetch_place_data(
+                        self.client,
+                        self.auth,
+                        place,
+                        invoices_details_payload=details.get(
+                            _place_contract_account(indexes[poc]) or ""
+                        ),
+                        slices=due[poc],
+                        previous=previous,
+                        history=self._history.place(poc),
+                        keep_raw=self._keep_raw,
+                        place_index=indexes[poc],
+                    )
                 except Exception as e:
                     _LOGGER.warning("Failed to fetch data for place %s: %s", poc, e)
-                    places_data[poc] = {"poc_number": poc}
-
-            # Backward-compatible top-level keys = first place's data
-            first: dict[str, Any] = {}
-            if places_data:
-                first = next(iter(places_data.values()))
-
-            return {
-                "profile": profile,
-                "me": me,
-                "places": places_raw,
-                # NEW: per-place data, keyed by poc_number
-                "places_data": places_data,
-                # Backward-compat (first place)
-                "address": first.get("address"),
-                "contract_account": first.get("contract_account"),
-                "contract_account_number": first.get("contract_account_number"),
-                "poc_number": first.get("poc_number"),
-                "division": first.get("division"),
-                "pa": first.get("pa"),
-                "installation_number": first.get("installation_number"),
-                "unpaid_list": first.get("unpaid_list", []),
-                "unpaid_last_value": first.get("unpaid_last_value"),
-                "invoices_details": first.get("invoices_details"),
-                "invoices_history": first.get("inv_hist", {}),
-                "unpaid_total": first.get("unpaid_total", 0.0),
-                "unpaid_items": first.get("unpaid_items", []),
-                "invoices_flat": first.get("invoices_flat", []),
-                "invoices_year_current": first.get("invoices_year_current", []),
-                "invoices_year_prev": first.get("invoices_year_prev", []),
-                "index_info": first.get("index_info"),
-                "consumption_by_month": first.get("consumption_by_month", {}),
-                "consumption_count": first.get("consumption_count", 0),
-                "consumption_total": first.get("consumption_total", 0.0),
-                "index_history_last": first.get("index_history_last"),
-                "index_history_by_month": first.get("index_history_by_month", {}),
-                "last_update": now_iso,
-                "attribution": ATTRIBUTION,
-            }
+                    self._places.setdefault(poc, _place_identity(place, indexes[poc]))
+                    return
+                finally:
+                    self.metrics.record_place(poc, phase, time.monotonic() - started)
+            current = self._places.get(poc)
+            self._mark_fresh(poc, result, current, fresh, now)
+            self._places[poc] = _merge_place(current, result, fresh)
+            fresh_by_poc[poc] = fresh
+
+        # Cererile expiră singure la termen, iar `_run_task_graph` oprește per clasă de
+        # date ce nu îl respectă (păstrând ce s-a terminat deja); oprirea de aici, mai
+        # târzie, prinde doar ce rămâne blocat în afara cererilor
+        remaining = deadline_remaining()
+        hard_stop = None if remaining is None else remaining + 2 * _DEADLINE_GRACE_SEC
+        try:
+            async with asyncio.timeout(hard_stop):
+                await asyncio.gather(*(_one(poc, place) for poc, place in jobs.items()))
+        except TimeoutError:
+            _LOGGER.warning(
+                "Engie: termenul refresh-ului a expirat; %d locuri rămân cu datele din cache",
+                sum(1 for poc in jobs if due[poc] and poc not in fresh_by_poc),
+            )
+
+        for poc, wanted in due.items():
+            if not wanted:
+                continue
+            state = self._places.get(poc) or _place_identity(jobs[poc], indexes[poc])
+            stale = set(state.stale).difference(slices)
+            stale |= wanted - fresh_by_poc.get(poc, set())
+            # O copie: snapshot-ul publicat anterior nu se modifică
+            self._places[poc] = replace(state, stale=tuple(sorted(stale)))
+
+    def _mark_fresh(
+        self,
+        poc: str,
+        result: PlaceSnapshot,
+        previous: PlaceSnapshot | None,
+        fresh: set[str],
+        now: float,
+    ) -> None:
+        """Record fetched data classes and invalidate histories on new activity."""
+        for name in fresh:
+            self._tiers.mark(name, poc, now)
+        if fresh & {tiers.CONSUMPTION, tiers.INDEX_HISTORY}:
+            self._history.async_schedule_save()
+        if not previous:
+            return
+
+        stale: set[str] = set()
+        # O factură nouă înseamnă istoric de facturi/consum/index nou
+        if tiers.UNPAID in fresh and _has_slice(previous, tiers.UNPAID):
+            old = {it.invoice_number for it in previous.unpaid_items}
+            new = {it.invoice_number for it in result.unpaid_items}
+            if new - old:
+                stale.update(tiers.HISTORY_SLICES)
+        # Un index nou transmis apare în istoricul de citiri
+        if tiers.INDEX_WINDOW in fresh and _has_slice(previous, tiers.INDEX_WINDOW):
+            old_idx = previous.reading.last_index if previous.reading else None
+            new_idx = result.reading.last_index if result.reading else None
+            if old_idx != new_idx:
+                stale.add(tiers.INDEX_HISTORY)
+        if stale - fresh:
+            _LOGGER.debug("Engie: activitate nouă pentru %s, reîmprospătez %s", poc, stale - fresh)
+            self._tiers.invalidate(poc, stale - fresh)
+
+    async def _async_update_data(self) -> EngieData:
+        """Critical phase: token, places, unpaid balances and reading window.
+
+        The result is published right away; addresses and histories are
+        fetched afterwards by `_async_enrich`, which publishes a second update.
+        Requests still pending at `REFRESH_DEADLINE_SEC` are abandoned and their
+        slices keep the cached value.
+        """
+        started = time.monotonic()
+        try:
+            with request_deadline(REFRESH_DEADLINE_SEC):
+                jobs = await self._async_fetch_critical()
         except EngieUnauthorized as e:
             raise ConfigEntryAuthFailed(str(e)) from e
         except EngieHTTPError as e:
             raise UpdateFailed(str(e)) from e
         except Exception as e:
             raise UpdateFailed(str(e)) from e
+        finally:
+            self.metrics.record_phase("critical", time.monotonic() - started)
+
+        _LOGGER.debug(
+            "Engie transport: %d cereri, %d conexiuni noi, %d reutilizate, %d reîncercări, "
+            "%d cereri comasate, %d amânate de limitator (max %.1fs), circuite deschise: %s",
+            self.transport.stats["requests"],
+            self.transport.stats["connections_created"],
+            self.transport.stats["connections_reused"],
+            self.transport.breakers.retries,
+            self.transport.single_flight.hits,
+            self.transport.rate_limiter.stats["delayed"],
+            self.transport.rate_limiter.stats["wait_max_sec"],
+            self.transport.breakers.open_endpoints() or "-",
+        )
+
+        data = _build_data(self._profile, dict(self._places), self._raw_account)
+        self._schedule_snapshot_save(data)
+        # Pornită în afara termenului fazei critice; are termenul ei
+        self._start_enrichment(jobs)
+        return data
+
+    async def _async_fetch_critical(self) -> dict[str, dict]:
+        await self.auth.ensure_valid_token()
+        await self._history.async_load()
+
+        now = time.time()
+        if self._profile is None or self._tiers.due(tiers.ACCOUNT, now=now):
+            try:
+                me = await self.auth.call_with_reauth(self.client.get_user)
+                places_raw = await self.auth.call_with_reauth(self.client.get_places)
+            except EngieUnauthorized:
+                raise
+            except Exception as e:
+                if self._profile is None:
+                    raise
+                # Profilul și lista de locuri se schimbă rar: continuăm cu cele din cache
+                _LOGGER.warning("Engie: nu pot reîmprospăta profilul, folosesc cache-ul: %s", e)
+            else:
+                self._tiers.mark(tiers.ACCOUNT, now=now)
+                self._profile = Profile.from_payload(me)
+                # Extract all places with poc_number
+                self._jobs = {}
+                self._indexes.clear()
+                for place in _extract_places_from_raw(places_raw):
+                    poc = _find_first(place, ["poc_number", "pocNumber", "poc"])
+                    if poc:
+                        self._jobs[poc] = place
+                self._raw_account = {"me": me, "places": places_raw} if self._keep_raw else None
+
+        jobs = dict(self._jobs)
+        self._tiers.retain_places(jobs)
+
+        await self._fetch_all_places(jobs, now, tiers.CRITICAL_SLICES, "critical")
+
+        # Keep only current places, in the order the API lists them
+        ordered = {poc: self._places[poc] for poc in jobs if poc in self._places}
+        self._places.clear()
+        self._places.update(ordered)
+        self.metrics.retain_places(jobs)
+        return jobs
+
+    def _start_enrichment(self, jobs: dict[str, dict]) -> None:
+        if self._enrich_task is not None and not self._enrich_task.done():
+            # Faza anterioară încă rulează; publică ea rezultatele
+            return
+        self._enrich_task = self.entry.async_create_background_task(
+            self.hass, self._async_enrich(jobs), f"{DOMAIN}_enrich_{self.entry.entry_id}"
+        )
+
+    async def _async_enrich(self, jobs: dict[str, dict]) -> None:
+        """Background phase: addresses, invoice archive, consumption and index history."""
+        started = time.monotonic()
+        try:
+            with request_deadline(ENRICHMENT_DEADLINE_SEC):
+                await self._fetch_all_places(
+                    jobs, time.time(), tiers.ENRICHMENT_SLICES, "enrichment"
+                )
+        except Exception as e:
+            _LOGGER.debug("Engie: faza de îmbogățire a eșuat: %s", e)
+            return
+        finally:
+            self.metrics.record_phase("enrichment", time.monotonic() - started)
+        base = self.data
+        if base is None:
+            return
+        data = _build_data(
+            base.profile,
+            {poc: self._places[poc] for poc in base.places if poc in self._places},
+            base.raw,
+        )
+        # Doar notificăm entitățile: coordinatorul nu are timer propriu
+        # (update_interval=None), ritmul refresh-urilor ține de scheduler.py
+        self.data = data
+        self.async_update_listeners()
+        self._schedule_snapshot_save(data)
+
+    def start_token_renewal(self) -> None:
+        """Pornește reînnoirea token-ului în fundal, decuplată de ciclul de refresh."""
+        if self._renew_task is not None and not self._renew_task.done():
+            return
+        self._renew_task = self.entry.async_create_background_task(
+            self.hass, self.auth.async_renewal_loop(), f"{DOMAIN}_token_{self.entry.entry_id}"
+        )
 
     async def async_close(self):
+        if self._enrich_task is not None:
+            self._enrich_task.cancel()
+        if self._renew_task is not None:
+            self._renew_task.cancel()
+        self.transport.clear_rate_limit(self.entry.entry_id)
+        await self._stores.async_flush()
         await self.client.close()
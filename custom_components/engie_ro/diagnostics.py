@@ -0,0 +1,74 @@
+"""Diagnostice pentru Engie România: configurație redactată și măsurători de performanță."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_BEARER_TOKEN,
+    CONF_DEVICE_ID,
+    CONF_PASSWORD,
+    CONF_TOKEN_FILE,
+    CONF_USERNAME,
+    DOMAIN,
+)
+from .coordinator import EngieDataCoordinator
+
+TO_REDACT = {
+    CONF_BEARER_TOKEN,
+    CONF_DEVICE_ID,
+    CONF_PASSWORD,
+    CONF_TOKEN_FILE,
+    CONF_USERNAME,
+    "token",
+    "refresh_token",
+    "email",
+    "phone",
+    "name",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    coordinator: EngieDataCoordinator | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    diag: dict[str, Any] = {"entry": async_redact_data(dict(entry.data), TO_REDACT)}
+    if coordinator is None:
+        return diag
+
+    transport = coordinator.transport
+    data = coordinator.data
+    # Locurile de consum apar doar ca index: POC-ul și adresa sunt date personale
+    places = [{"stale": list(pd.stale)} for pd in (data.places.values() if data else ())]
+    diag.update(
+        {
+            "last_update": data.last_update if data else None,
+            "places": places,
+            "refresh": {
+                **coordinator.metrics.as_dict(),
+                "places_last_sec": list(coordinator.metrics.places.values()),
+            },
+            # Cererile acestei intrări; `transport.api` le cuprinde pe ale tuturor intrărilor
+            "api": coordinator.client.metrics.as_dict(),
+            "api_coalesced": coordinator.client.metrics.coalesced,
+            "auth": dict(coordinator.auth.stats),
+            "transport": {
+                **transport.stats,
+                "reuse_ratio": round(transport.reuse_ratio, 3),
+                "api": transport.metrics.as_dict(),
+                "retries": transport.breakers.retries,
+                "open_circuits": transport.breakers.open_endpoints(),
+                "coalesced": transport.single_flight.hits,
+                "rate_limiter": {
+                    "rate": transport.rate_limiter.rate,
+                    "burst": transport.rate_limiter.burst,
+                    **transport.rate_limiter.stats,
+                },
+            },
+        }
+    )
+    return diag
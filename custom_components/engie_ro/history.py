@@ -0,0 +1,137 @@
+"""Istoric persistent și incremental pentru citiri de index și plăți/consum.
+
+Pentru fiecare loc de consum se păstrează toate citirile și plățile cunoscute.
+La un refresh se cere API-ului doar fereastra de după ultima intrare cunoscută
+(cu o suprapunere mică pentru corecții), iar istoricul poate crește dincolo de
+ferestrele de 1 și 3 ani fără să crească dimensiunea răspunsurilor.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import date, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, HISTORY_OVERLAP_DAYS
+
+_LOGGER = logging.getLogger(__name__)
+
+_STORAGE_VERSION = 1
+_SAVE_DELAY_SEC = 30
+
+READINGS = "readings"
+CONSUMPTION = "consumption"
+
+
+class PlaceHistory:
+    """Citirile (`data -> index`) și plățile (`cheie -> [data, sumă]`) unui loc."""
+
+    __slots__ = ("readings", "consumption")
+
+    def __init__(
+        self,
+        readings: dict[str, int] | None = None,
+        consumption: dict[str, list] | None = None,
+    ) -> None:
+        self.readings: dict[str, int] = dict(readings or {})
+        self.consumption: dict[str, list] = dict(consumption or {})
+
+    def _dates(self, kind: str) -> Iterable[str]:
+        if kind == READINGS:
+            return self.readings.keys()
+        return (str(v[0]) for v in self.consumption.values())
+
+    def window_start(self, kind: str, default_start: date) -> str:
+        """Data de start a cererii: după ultima intrare cunoscută, minus suprapunerea."""
+        last = max((d[:10] for d in self._dates(kind) if d), default=None)
+        if last is None:
+            return default_start.strftime("%Y-%m-%d")
+        try:
+            last_day = date.fromisoformat(last)
+        except ValueError:
+            return default_start.strftime("%Y-%m-%d")
+        start = max(last_day - timedelta(days=HISTORY_OVERLAP_DAYS), default_start)
+        return start.strftime("%Y-%m-%d")
+
+    def merge_readings(self, entries: Iterable[tuple[str, int]], window_start: str) -> bool:
+        """Combină citirile primite pentru fereastra care începe la `window_start`.
+
+        Un răspuns nevid este autoritar pentru fereastra lui: citirile stocate din
+        fereastră care nu mai apar sunt eliminate (corecții).
+        """
+        fresh = {d: idx for d, idx in entries}
+        if not fresh:
+            return False
+        before = dict(self.readings)
+        for d in [d for d in self.readings if d >= window_start and d not in fresh]:
+            del self.readings[d]
+        self.readings.update(fresh)
+        return self.readings != before
+
+    def merge_consumption(
+        self, entries: Iterable[tuple[str, str, float]], window_start: str
+    ) -> bool:
+        """Combină plățile `(cheie, dată, sumă)` primite pentru fereastra dată."""
+        fresh = {key: [d, amount] for key, d, amount in entries}
+        if not fresh:
+            return False
+        before = dict(self.consumption)
+        for key in [
+            k
+            for k, v in self.consumption.items()
+            if str(v[0])[:10] >= window_start and k not in fresh
+        ]:
+            del self.consumption[key]
+        self.consumption.update(fresh)
+        return self.consumption != before
+
+    def as_dict(self) -> dict[str, Any]:
+        return {READINGS: self.readings, CONSUMPTION: self.consumption}
+
+
+class EngieHistoryStore:
+    """Istoricul tuturor locurilor de consum ale unei intrări, salvat în `.storage`."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store = Store(hass, _STORAGE_VERSION, f"{DOMAIN}.history.{entry_id}")
+        self._places: dict[str, PlaceHistory] = {}
+        self._loaded = False
+        self._save_pending = False
+
+    async def async_load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            stored = await self._store.async_load() or {}
+        except Exception as e:
+            _LOGGER.debug("Engie: nu pot citi istoricul salvat: %s", e)
+            return
+        for poc, raw in (stored.get("places") or {}).items():
+            if isinstance(raw, dict):
+                self._places[poc] = PlaceHistory(raw.get(READINGS), raw.get(CONSUMPTION))
+
+    def place(self, poc: str) -> PlaceHistory:
+        return self._places.setdefault(poc, PlaceHistory())
+
+    def async_schedule_save(self) -> None:
+        self._save_pending = True
+        self._store.async_delay_save(self._data, _SAVE_DELAY_SEC)
+
+    def _data(self) -> dict[str, Any]:
+        self._save_pending = False
+        return {"places": {poc: h.as_dict() for poc, h in self._places.items()}}
+
+    async def async_flush(self) -> None:
+        """Scrie imediat salvarea amânată, dacă există una."""
+        if self._save_pending:
+            await self._store.async_save(self._data())
+
+    async def async_remove(self) -> None:
+        # Pe aceeași instanță: anulează și salvarea amânată
+        self._save_pending = False
+        await self._store.async_remove()
@@ -0,0 +1,161 @@
+"""Măsurători de performanță pentru API-ul Engie și pentru refresh-uri.
+
+`ApiMetrics` este alimentat de `EngieClient` (câte o înregistrare pe
+încercare): fiecare client are măsurătorile lui, care se adună și în cele ale
+transportului partajat (toate intrările); `RefreshMetrics` aparține fiecărui
+coordinator. Ambele păstrează doar ultimele `_SAMPLES` durate, ca memoria să
+rămână constantă, și sunt expuse prin senzorii de diagnostic și `diagnostics.py`.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+_SAMPLES = 256
+
+
+def _percentile(ordered: list[float], pct: float) -> float | None:
+    """Percentila `pct` (nearest-rank) dintr-o listă deja sortată."""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencySamples:
+    """Ultimele durate (în secunde) și percentilele lor, în milisecunde."""
+
+    __slots__ = ("_samples",)
+
+    def __init__(self) -> None:
+        self._samples: deque[float] = deque(maxlen=_SAMPLES)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    @property
+    def last(self) -> float | None:
+        return self._samples[-1] if self._samples else None
+
+    def percentiles_ms(self) -> dict[str, float | None]:
+        ordered = sorted(self._samples)
+        return {
+            f"p{pct}_ms": None if (v := _percentile(ordered, pct)) is None else round(v * 1000, 1)
+            for pct in (50, 95, 99)
+        }
+
+
+class EndpointMetrics:
+    """Contoarele unui endpoint (numele stabil, fără POC)."""
+
+    __slots__ = ("requests", "errors", "retries", "bytes_total", "bytes_max", "latency", "_parent")
+
+    def __init__(self, parent: EndpointMetrics | None = None) -> None:
+        self._parent = parent
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_total = 0
+        self.bytes_max = 0
+        self.latency = LatencySamples()
+
+    def record(self, seconds: float, size: int | None, ok: bool) -> None:
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        if size is not None:
+            self.bytes_total += size
+            self.bytes_max = max(self.bytes_max, size)
+        self.latency.add(seconds)
+        if self._parent is not None:
+            self._parent.record(seconds, size, ok)
+
+    def record_retry(self) -> None:
+        self.retries += 1
+        if self._parent is not None:
+            self._parent.record_retry()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_total": self.bytes_total,
+            "bytes_max": self.bytes_max,
+            **self.latency.percentiles_ms(),
+        }
+
+
+class ApiMetrics:
+    """Măsurători pe endpoint; cu `parent`, fiecare înregistrare se adună și acolo."""
+
+    def __init__(self, parent: ApiMetrics | None = None) -> None:
+        self._parent = parent
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        # Cereri servite din cererea identică a altui apelant (SingleFlight)
+        self.coalesced = 0
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            parent = self._parent.endpoint(name) if self._parent is not None else None
+            metrics = self.endpoints[name] = EndpointMetrics(parent)
+        return metrics
+
+    @property
+    def requests(self) -> int:
+        return sum(m.requests for m in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(m.errors for m in self.endpoints.values())
+
+    @property
+    def retries(self) -> int:
+        return sum(m.retries for m in self.endpoints.values())
+
+    def slowest(self) -> tuple[str, float] | None:
+        """Endpoint-ul cu cel mai mare p95 și valoarea lui (ms)."""
+        best: tuple[str, float] | None = None
+        for name, metrics in self.endpoints.items():
+            p95 = metrics.latency.percentiles_ms()["p95_ms"]
+            if p95 is not None and (best is None or p95 > best[1]):
+                best = (name, p95)
+        return best
+
+    def as_dict(self) -> dict[str, Any]:
+        return {name: m.as_dict() for name, m in sorted(self.endpoints.items())}
+
+
+class RefreshMetrics:
+    """Duratele fazelor de refresh și ale fiecărui loc de consum, pentru un coordinator."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, LatencySamples] = {}
+        self.places: dict[str, dict[str, float]] = {}
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        self.phases.setdefault(phase, LatencySamples()).add(seconds)
+
+    def record_place(self, poc: str, phase: str, seconds: float) -> None:
+        self.places.setdefault(poc, {})[phase] = round(seconds, 3)
+
+    def retain_places(self, pocs: Iterable[str]) -> None:
+        keep = set(pocs)
+        self.places = {poc: v for poc, v in self.places.items() if poc in keep}
+
+    def last_phase(self, phase: str) -> float | None:
+        samples = self.phases.get(phase)
+        return None if samples is None or samples.last is None else round(samples.last, 3)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phases": {
+                phase: {"last_sec": self.last_phase(phase), **samples.percentiles_ms()}
+                for phase, samples in self.phases.items()
+            },
+            "places_last_sec": {poc: dict(v) for poc, v in self.places.items()},
+        }
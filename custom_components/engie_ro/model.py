@@ -0,0 +1,401 @@
+"""Modelul compact al datelor publicate de coordinator (`coordinator.data`).
+
+Se păstrează doar câmpurile parsate: profilul, iar pentru fiecare loc de consum
+identitatea, citirea curentă, facturile și rezumatele istoricelor. Payload-urile
+brute (`me`, `places`, `ballance-details`, istoricul facturilor) rămân în memorie
+numai cu opțiunea de depanare `keep_raw_payloads`.
+
+Codul vechi care citea `coordinator.data["..."]` funcționează în continuare:
+`EngieData` și `PlaceSnapshot.legacy` sunt vederi read-only cu cheile vechi,
+calculate la cerere.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+from typing import Any
+
+from . import tiers
+from .const import ATTRIBUTION, CONSUMPTION_WINDOW_DAYS, INDEX_HISTORY_WINDOW_DAYS
+from .series import TimeSeries
+
+# Câmpurile fiecărei clase de date (vezi tiers.py)
+SLICE_FIELDS: dict[str, tuple[str, ...]] = {
+    tiers.DIVISIONS: ("address",),
+    tiers.INDEX_WINDOW: ("reading", "installation_number"),
+    tiers.UNPAID: (
+        "raw_invoices_details",
+        "pending",
+        "unpaid_last_value",
+        "unpaid_total",
+        "unpaid_items",
+    ),
+    tiers.INVOICES_HISTORY: ("raw_invoices_history", "invoices"),
+    tiers.CONSUMPTION: ("consumption",),
+    tiers.INDEX_HISTORY: ("readings",),
+}
+
+_RO_MONTHS = (
+    "",
+    "ianuarie",
+    "februarie",
+    "martie",
+    "aprilie",
+    "mai",
+    "iunie",
+    "iulie",
+    "august",
+    "septembrie",
+    "octombrie",
+    "noiembrie",
+    "decembrie",
+)
+
+_UNPAID_FIELDS = ("invoice_number", "unpaid", "due_date", "total")
+_HISTORY_FIELDS = (
+    "month",
+    "invoice_number",
+    "division",
+    "invoiced_at",
+    "consum_gaz",
+    "consum_elec",
+)
+
+
+def month_label(year: int, month: int) -> str:
+    return f"{_RO_MONTHS[month]} {year}"
+
+
+def format_lei(value: float) -> str:
+    return f"{value:.2f} lei".replace(".", ",")
+
+
+def consumption_by_month(series: TimeSeries) -> dict[str, str]:
+    """`{"ianuarie 2025": "370,93 lei", ...}`, cea mai recentă lună prima."""
+    return {month_label(y, m): format_lei(v) for y, m, v in series.by_month("sum")}
+
+
+def index_by_month(series: TimeSeries) -> dict[str, int]:
+    """`{"martie 2026": 437, ...}`: ultima citire a fiecărei luni, cea mai recentă prima."""
+    return {month_label(y, m): int(v) for y, m, v in series.by_month("last")}
+
+
+class LegacyView(Mapping[str, Any]):
+    """Vedere read-only cu cheile vechi, fiecare calculată la cerere din model."""
+
+    __slots__ = ("_source", "_getters")
+
+    def __init__(self, source: Any, getters: Mapping[str, Callable[[Any], Any]]) -> None:
+        self._source = source
+        self._getters = getters
+
+    def __getitem__(self, key: str) -> Any:
+        return self._getters[key](self._source)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._getters)
+
+    def __len__(self) -> int:
+        return len(self._getters)
+
+
+@dataclass(slots=True, frozen=True)
+class Profile:
+    email: str | None = None
+    name: str | None = None
+    phone: str | None = None
+
+    @classmethod
+    def from_payload(cls, me: Any) -> Profile:
+        data = (me.get("data") or {}) if isinstance(me, dict) else {}
+        return cls(data.get("email"), data.get("user_name"), data.get("phone"))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"email": self.email, "name": self.name, "phone": self.phone}
+
+
+@dataclass(slots=True, frozen=True)
+class Reading:
+    """Ultimul index și fereastra de transmitere a indexului pentru un loc."""
+
+    last_index: Any = None
+    autocit: Any = None
+    permite_index: Any = None
+    start_date: str | None = None
+    end_date: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+@dataclass(slots=True, frozen=True)
+class Invoice:
+    """O factură: restantă (sold) sau din arhiva lunară (istoric)."""
+
+    invoice_number: str | None = None
+    unpaid: Any = None
+    due_date: str | None = None
+    total: Any = None
+    month: str | None = None
+    invoiced_at: str | None = None
+    division: str | None = None
+    consum_gaz: Any = None
+    consum_elec: Any = None
+
+    def as_dict(self, keys: Iterable[str] | None = None) -> dict[str, Any]:
+        if keys is None:
+            return {
+                f.name: getattr(self, f.name)
+                for f in fields(self)
+                if getattr(self, f.name) is not None
+            }
+        return {k: getattr(self, k) for k in keys}
+
+
+def _invoices_of_year(place: PlaceSnapshot, year: int) -> list[dict[str, Any]]:
+    found = [
+        inv.as_dict(_HISTORY_FIELDS)
+        for inv in place.invoices
+        if "-" in (inv.month or "")[:7] and inv.month.split("-")[0] == str(year)
+    ]
+    found.sort(key=lambda x: str(x.get("month")))
+    return found
+
+
+_PLACE_LEGACY: dict[str, Callable[[PlaceSnapshot], Any]] = {
+    "poc_number": lambda p: p.poc_number,
+    "contract_account": lambda p: p.contract_account,
+    "contract_account_number": lambda p: p.contract_account_number,
+    "pa": lambda p: p.pa,
+    "division": lambda p: p.division,
+    "address": lambda p: p.address,
+    "index_info": lambda p: p.reading.as_dict() if p.reading else None,
+    "installation_number": lambda p: p.installation_number,
+    "invoices_details": lambda p: p.raw_invoices_details,
+    "unpaid_list": lambda p: list(p.pending),
+    "unpaid_last_value": lambda p: p.unpaid_last_value,
+    "unpaid_total": lambda p: p.unpaid_total,
+    "unpaid_items": lambda p: [inv.as_dict(_UNPAID_FIELDS) for inv in p.unpaid_items],
+    "inv_hist": lambda p: p.raw_invoices_history or {},
+    "invoices_flat": lambda p: [inv.as_dict(_HISTORY_FIELDS) for inv in p.invoices],
+    "invoices_year_current": lambda p: _invoices_of_year(p, datetime.now().year),
+    "invoices_year_prev": lambda p: _invoices_of_year(p, datetime.now().year - 1),
+    "consumption_by_month": lambda p: consumption_by_month(p.recent_consumption()),
+    "consumption_count": lambda p: len(p.recent_consumption()),
+    "consumption_total": lambda p: round(p.recent_consumption().total(), 2),
+    "index_history_last": lambda p: p.last_index,
+    "index_history_by_month": lambda p: index_by_month(p.recent_readings()),
+    "stale": lambda p: list(p.stale),
+}
+
+
+@dataclass(slots=True, eq=False)
+class PlaceSnapshot:
+    """Starea parsată a unui loc de consum.
+
+    `loaded` ține clasele de date care au o valoare (adusă acum, din cache sau
+    substitutul unei cereri eșuate); un loc doar identificat nu are niciuna.
+    """
+
+    poc_number: str | None
+    contract_account: str | None = None
+    contract_account_number: str | None = None
+    pa: str | None = None
+    division: str | None = None
+    # Din lista de locuri: adresa formatată, câmpurile adresei și ale contului contract
+    label: str | None = None
+    address_fields: dict[str, Any] = field(default_factory=dict)
+    contract_fields: dict[str, Any] = field(default_factory=dict)
+
+    address: str | None = None
+    reading: Reading | None = None
+    installation_number: str | None = None
+    pending: tuple[dict[str, Any], ...] = ()
+    unpaid_last_value: float | None = None
+    unpaid_total: float = 0.0
+    unpaid_items: tuple[Invoice, ...] = ()
+    invoices: tuple[Invoice, ...] = ()
+    # Plățile (sumă în lei) și citirile de index, pe zile
+    consumption: TimeSeries = field(default_factory=TimeSeries)
+    readings: TimeSeries = field(default_factory=TimeSeries)
+
+    stale: tuple[str, ...] = ()
+    loaded: frozenset[str] = frozenset()
+    # Doar cu `keep_raw_payloads`
+    raw_invoices_details: Any = None
+    raw_invoices_history: Any = None
+
+    @property
+    def last_index(self) -> int | None:
+        last = self.readings.last()
+        return None if last is None else int(last[1])
+
+    def recent_consumption(self, today: date | None = None) -> TimeSeries:
+        """Plățile din ultimele `CONSUMPTION_WINDOW_DAYS` zile, cum le afișează senzorii."""
+        today = today or date.today()
+        return self.consumption.between(today - timedelta(days=CONSUMPTION_WINDOW_DAYS))
+
+    def recent_readings(self, today: date | None = None) -> TimeSeries:
+        """Citirile din ultimele `INDEX_HISTORY_WINDOW_DAYS` zile."""
+        today = today or date.today()
+        return self.readings.between(today - timedelta(days=INDEX_HISTORY_WINDOW_DAYS))
+
+    def has(self, data_class: str) -> bool:
+        return data_class in self.loaded
+
+    def set_slice(self, data_class: str, values: Mapping[str, Any]) -> None:
+        for name, value in values.items():
+            setattr(self, name, value)
+        self.loaded = self.loaded | {data_class}
+
+    def take(self, other: PlaceSnapshot | None, data_classes: Iterable[str]) -> None:
+        """Copiază din `other` clasele de date indicate pe care acesta le are."""
+        if other is None:
+            return
+        for data_class in data_classes:
+            if other.has(data_class):
+                self.set_slice(data_class, {k: getattr(other, k) for k in SLICE_FIELDS[data_class]})
+
+    @property
+    def legacy(self) -> Mapping[str, Any]:
+        return LegacyView(self, _PLACE_LEGACY)
+
+    def as_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.name.startswith("raw_") and value is None:
+                continue
+            if f.name == "reading":
+                value = value.as_dict() if value else None
+            elif f.name in ("unpaid_items", "invoices"):
+                value = [inv.as_dict() for inv in value]
+            elif f.name in ("consumption", "readings"):
+                value = value.as_dict()
+            elif f.name == "loaded":
+                value = sorted(value)
+            elif f.name in ("pending", "stale"):
+                value = list(value)
+            out[f.name] = value
+        return out
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any]) -> PlaceSnapshot:
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in raw.items() if k in known}
+        reading = values.get("reading")
+        values["reading"] = Reading(**reading) if isinstance(reading, dict) else None
+        for name in ("unpaid_items", "invoices"):
+            values[name] = tuple(Invoice(**inv) for inv in values.get(name) or ())
+        for name in ("pending", "stale"):
+            values[name] = tuple(values.get(name) or ())
+        for name in ("consumption", "readings"):
+            values[name] = TimeSeries.from_dict(values.get(name))
+        values["loaded"] = frozenset(values.get("loaded") or ())
+        values.setdefault("poc_number", None)
+        return cls(**values)
+
+
+def _first(data: EngieData, key: str, default: Any = None) -> Any:
+    first = next(iter(data.places.values()), None)
+    return default if first is None else first.legacy[key]
+
+
+# Cheile de la nivelul de sus de dinainte de model; câmpurile primului loc erau
+# duplicate aici pentru compatibilitate
+_DATA_LEGACY: dict[str, Callable[[EngieData], Any]] = {
+    "profile": lambda d: d.profile.as_dict(),
+    "me": lambda d: (d.raw or {}).get("me"),
+    "places": lambda d: (d.raw or {}).get("places"),
+    "places_data": lambda d: MappingProxyType(
+        {poc: place.legacy for poc, place in d.places.items()}
+    ),
+    **{
+        key: (lambda d, key=key: _first(d, key))
+        for key in (
+            "address",
+            "contract_account",
+            "contract_account_number",
+            "poc_number",
+            "division",
+            "pa",
+            "installation_number",
+            "unpaid_last_value",
+            "invoices_details",
+            "index_info",
+            "index_history_last",
+        )
+    },
+    "unpaid_list": lambda d: _first(d, "unpaid_list", []),
+    "invoices_history": lambda d: _first(d, "inv_hist", {}),
+    "unpaid_total": lambda d: _first(d, "unpaid_total", 0.0),
+    "unpaid_items": lambda d: _first(d, "unpaid_items", []),
+    "invoices_flat": lambda d: _first(d, "invoices_flat", []),
+    "invoices_year_current": lambda d: _first(d, "invoices_year_current", []),
+    "invoices_year_prev": lambda d: _first(d, "invoices_year_prev", []),
+    "consumption_by_month": lambda d: _first(d, "consumption_by_month", {}),
+    "consumption_count": lambda d: _first(d, "consumption_count", 0),
+    "consumption_total": lambda d: _first(d, "consumption_total", 0.0),
+    "index_history_by_month": lambda d: _first(d, "index_history_by_month", {}),
+    "last_update": lambda d: d.last_update,
+    "attribution": lambda d: ATTRIBUTION,
+}
+
+
+class EngieData(Mapping[str, Any]):
+    """`coordinator.data`: profilul și locurile de consum, indexate după POC.
+
+    Atributele sunt modelul; indexarea cu cheile vechi (`data["places_data"]`,
+    `data["unpaid_total"]`, ...) trece prin vederea de compatibilitate.
+    """
+
+    __slots__ = ("profile", "places", "last_update", "raw")
+
+    def __init__(
+        self,
+        profile: Profile,
+        places: dict[str, PlaceSnapshot],
+        last_update: str | None = None,
+        raw: dict[str, Any] | None = None,
+    ) -> None:
+        self.profile = profile
+        self.places = places
+        self.last_update = last_update
+        # `me` și `places` brute, doar cu `keep_raw_payloads`
+        self.raw = raw
+
+    def __getitem__(self, key: str) -> Any:
+        return _DATA_LEGACY[key](self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_DATA_LEGACY)
+
+    def __len__(self) -> int:
+        return len(_DATA_LEGACY)
+
+    def as_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "profile": self.profile.as_dict(),
+            "places": {poc: place.as_dict() for poc, place in self.places.items()},
+            "last_update": self.last_update,
+        }
+        if self.raw is not None:
+            out["raw"] = self.raw
+        return out
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any]) -> EngieData:
+        profile = raw.get("profile") or {}
+        return cls(
+            Profile(profile.get("email"), profile.get("name"), profile.get("phone")),
+            {
+                str(poc): PlaceSnapshot.from_dict(place)
+                for poc, place in (raw.get("places") or {}).items()
+                if isinstance(place, dict)
+            },
+            raw.get("last_update"),
+            raw.get("raw"),
+        )
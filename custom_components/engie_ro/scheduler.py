@@ -0,0 +1,101 @@
+"""Programarea eșalonată a refresh-urilor pentru toate intrările Engie România.
+
+Fiecare intrare primește o fază fixă în intervalul de actualizare, calculată
+din poziția ei în lista sortată a intrărilor, astfel încât conturile nu mai
+pornesc toate în aceeași secundă (de exemplu după o repornire HA). La
+adăugarea sau ștergerea unei intrări fazele sunt redistribuite uniform.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections.abc import Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DATA_SCHEDULER, DOMAIN, UPDATE_INTERVAL_SEC
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EngieRefreshScheduler:
+    """Declanșează refresh-ul fiecărei intrări la faza ei din interval."""
+
+    def __init__(self, hass: HomeAssistant, interval: float = UPDATE_INTERVAL_SEC) -> None:
+        self.hass = hass
+        self.interval = interval
+        self._entries: dict[str, tuple[ConfigEntry, DataUpdateCoordinator]] = {}
+        self._offsets: dict[str, float] = {}
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+
+    def next_run(self, entry_id: str, now: float | None = None) -> float | None:
+        """Momentul (epoch) următorului refresh programat al intrării."""
+        offset = self._offsets.get(entry_id)
+        if offset is None:
+            return None
+        now = time.time() if now is None else now
+        # Fazele sunt ancorate în timpul absolut, deci rămân aceleași după repornire
+        cycles = math.floor((now - offset) / self.interval) + 1
+        return cycles * self.interval + offset
+
+    def add(self, entry: ConfigEntry, coordinator: DataUpdateCoordinator) -> None:
+        self._entries[entry.entry_id] = (entry, coordinator)
+        self._rebalance()
+
+    def remove(self, entry_id: str) -> bool:
+        """Scoate intrarea; întoarce True dacă nu mai rămâne nicio intrare."""
+        self._entries.pop(entry_id, None)
+        self._rebalance()
+        return not self._entries
+
+    def _rebalance(self) -> None:
+        for unsub in self._unsubs.values():
+            unsub()
+        self._unsubs.clear()
+        ids = sorted(self._entries)
+        step = self.interval / len(ids) if ids else 0
+        self._offsets = {entry_id: i * step for i, entry_id in enumerate(ids)}
+        for entry_id in ids:
+            self._schedule(entry_id)
+        if ids:
+            _LOGGER.debug("Engie: faze de refresh %s", self._offsets)
+
+    def _schedule(self, entry_id: str) -> None:
+        next_run = self.next_run(entry_id)
+        if next_run is None:
+            return
+        self._unsubs[entry_id] = async_call_later(
+            self.hass, max(0.0, next_run - time.time()), self._make_fire(entry_id)
+        )
+
+    def _make_fire(self, entry_id: str) -> Callable[[object], None]:
+        @callback
+        def _fire(_now: object) -> None:
+            self._unsubs.pop(entry_id, None)
+            if entry_id not in self._entries:
+                return
+            entry, coordinator = self._entries[entry_id]
+            self._schedule(entry_id)
+            entry.async_create_background_task(
+                self.hass, coordinator.async_refresh(), f"{DOMAIN}_refresh_{entry_id}"
+            )
+
+        return _fire
+
+
+def async_get_scheduler(hass: HomeAssistant) -> EngieRefreshScheduler:
+    scheduler: EngieRefreshScheduler | None = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_SCHEDULER] = EngieRefreshScheduler(hass)
+    return scheduler
+
+
+def async_unschedule(hass: HomeAssistant, entry_id: str) -> None:
+    scheduler: EngieRefreshScheduler | None = hass.data.get(DATA_SCHEDULER)
+    if scheduler is not None and scheduler.remove(entry_id):
+        hass.data.pop(DATA_SCHEDULER, None)
@@ -1,23 +1,33 @@
 from __future__ import annotations
 
-from collections.abc import Mapping
+from datetime import datetime
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from . import tiers
 from .const import ATTRIBUTION, DOMAIN
 from .coordinator import EngieDataCoordinator
+from .model import (
+    PlaceSnapshot,
+    Profile,
+    Reading,
+    consumption_by_month,
+    format_lei,
+    index_by_month,
+)
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
-def _in_reading_window(index_info: dict) -> str:
+def _in_reading_window(reading: Reading | None) -> str:
     """Return 'Da' if today falls within the meter-reading window, 'Nu' otherwise.
 
     Dates from the API are in dd-mm-yyyy format (e.g. '20-03-2026').
@@ -25,8 +35,10 @@ def _in_reading_window(index_info: dict) -> str:
     """
     from datetime import date
 
-    start_raw = index_info.get("start_date") or ""
-    end_raw = index_info.get("end_date") or ""
+    if reading is None:
+        return "Nu"
+    start_raw = reading.start_date or ""
+    end_raw = reading.end_date or ""
 
     if start_raw and end_raw:
         try:
@@ -45,99 +57,7 @@ def _in_reading_window(index_info: dict) -> str:
             pass
 
     # Fallback: legacy flags
-    return "Da" if index_info.get("permite_index") or index_info.get("autocit") else "Nu"
-
-
-def _extract_places(raw: Any) -> list[dict[str, Any]]:
-    """Return only real consumption places (those with a poc_number)."""
-
-    def _walk(node: Any):
-        if isinstance(node, dict):
-            yield node
-            for value in node.values():
-                yield from _walk(value)
-        elif isinstance(node, list):
-            for item in node:
-                yield from _walk(item)
-
-    places: list[dict[str, Any]] = []
-    seen: set[str] = set()
-
-    for item in _walk(raw):
-        if not isinstance(item, dict):
-            continue
-        poc = item.get("poc_number") or item.get("pocNumber") or item.get("poc")
-        if not poc:
-            continue
-        uid = str(poc).strip()
-        if not uid or uid in seen:
-            continue
-        seen.add(uid)
-        places.append(item)
-
-    return places
-
-
-def _format_address_value(value: Any) -> str | None:
-    if not value:
-        return None
-    if isinstance(value, str):
-        return value.strip() or None
-    if isinstance(value, Mapping):
-        inline = value.get("inline")
-        if inline:
-            return str(inline)
-        parts: list[str] = []
-        street = value.get("street")
-        number = value.get("number")
-        building = value.get("building")
-        staircase = value.get("staircase")
-        floor = value.get("floor")
-        apartment = value.get("apartment")
-        city = value.get("city")
-        if street:
-            street_part = str(street)
-            if number:
-                street_part += f" {number}"
-            parts.append(street_part)
-        if building:
-            parts.append(f"Bl. {building}")
-        if staircase:
-            parts.append(f"Sc. {staircase}")
-        if floor:
-            parts.append(f"Et. {floor}")
-        if apartment:
-            parts.append(f"Ap. {apartment}")
-        if city:
-            parts.append(str(city))
-        if parts:
-            return ", ".join(parts)
-    return str(value)
-
-
-def _place_poc(place: Mapping[str, Any], index: int) -> str:
-    return str(place.get("poc_number") or place.get("pocNumber") or place.get("poc") or index)
-
-
-def _place_address(place: Mapping[str, Any], index: int) -> str:
-    for key in ("address", "consumptionPlaceAddress", "name", "label", "site_name", "siteName"):
-        formatted = _format_address_value(place.get(key))
-        if formatted:
-            return formatted
-    return f"Loc consum {index + 1}"
-
-
-def _place_contract(place: Mapping[str, Any]) -> str | None:
-    return (
-        place.get("contract_account")
-        or place.get("contractAccount")
-        or place.get("contract_account_number")
-        or place.get("contractAccountNumber")
-    )
-
-
-def _place_division(place: Mapping[str, Any]) -> str | None:
-    return place.get("division") or place.get("commodity") or place.get("type")
+    return "Da" if reading.permite_index or reading.autocit else "Nu"
 
 
 # ---------------------------------------------------------------------------
@@ -147,12 +67,15 @@ def _place_division(place: Mapping[str, Any]) -> str | None:
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> None:
     coordinator: EngieDataCoordinator = hass.data[DOMAIN][entry.entry_id]
-    data = coordinator.data or {}
-    places = _extract_places(data.get("places"))
+    places = list(coordinator.data.places.values()) if coordinator.data else []
 
     entities: list[SensorEntity] = [
         EngieAccountSensor(coordinator, entry, "account_places_count"),
         EngieAccountSensor(coordinator, entry, "account_profile"),
+        EngieDiagnosticSensor(coordinator, entry, "api_requests"),
+        EngieDiagnosticSensor(coordinator, entry, "api_latency_p95"),
+        EngieDiagnosticSensor(coordinator, entry, "refresh_duration"),
+        EngieLastUpdateSensor(coordinator, entry),
     ]
 
     for idx, place in enumerate(places):
@@ -250,8 +173,12 @@ class EngieBaseEntity(CoordinatorEntity[EngieDataCoordinator], SensorEntity):
 
     @property
     def account_device_info(self) -> DeviceInfo:
-        profile = (self.coordinator.data or {}).get("profile") or {}
-        email = profile.get("email") or self._entry.data.get("username") or self._entry.title
+        data = self.coordinator.data
+        email = (
+            (data.profile.email if data else None)
+            or self._entry.data.get("username")
+            or self._entry.title
+        )
         return DeviceInfo(
             identifiers={self._account_identifier},
             manufacturer="Engie România",
@@ -293,29 +220,147 @@ class EngieAccountSensor(EngieBaseEntity):
 
     @property
     def native_value(self) -> Any:
-        data = self.coordinator.data or {}
+        data = self.coordinator.data
         if self._sensor_key == "account_places_count":
-            return len(_extract_places(data.get("places")))
+            return len(data.places) if data else 0
         if self._sensor_key == "account_profile":
-            prof = data.get("profile") or {}
-            return prof.get("email") or prof.get("name") or self._entry.title
+            prof = data.profile if data else Profile()
+            return prof.email or prof.name or self._entry.title
         return None
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
-        data = self.coordinator.data or {}
+        data = self.coordinator.data
         if self._sensor_key == "account_profile":
-            prof = data.get("profile") or {}
+            prof = data.profile if data else Profile()
             return {
                 "attribution": ATTRIBUTION,
-                "email": prof.get("email"),
-                "nume": prof.get("name"),
-                "telefon": prof.get("phone"),
-                "last_update": data.get("last_update"),
+                "email": prof.email,
+                "nume": prof.name,
+                "telefon": prof.phone,
+                "last_update": data.last_update if data else None,
             }
         return {"attribution": ATTRIBUTION}
 
 
+# ---------------------------------------------------------------------------
+# Diagnostic sensors (disabled by default)
+# ---------------------------------------------------------------------------
+
+
+class EngieDiagnosticSensor(EngieBaseEntity):
+    """Sănătatea API-ului și duratele refresh-ului (vezi metrics.py)."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self, coordinator: EngieDataCoordinator, entry: ConfigEntry, sensor_key: str
+    ) -> None:
+        super().__init__(coordinator, entry)
+        self._sensor_key = sensor_key
+        self._attr_unique_id = f"{entry.entry_id}_{sensor_key}"
+        self._attr_name = {
+            "api_requests": "Engie – Cereri API",
+            "api_latency_p95": "Engie – Latență API p95",
+            "refresh_duration": "Engie – Durată refresh",
+        }[sensor_key]
+        self._attr_icon = {
+            "api_requests": "mdi:api",
+            "api_latency_p95": "mdi:timer-outline",
+            "refresh_duration": "mdi:timer-sand",
+        }[sensor_key]
+        if sensor_key == "api_latency_p95":
+            self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        elif sensor_key == "refresh_duration":
+            self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+        else:
+            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return self.account_device_info
+
+    @property
+    def native_value(self) -> Any:
+        # Doar cererile acestui cont; totalurile integrării sunt în diagnostics
+        api = self.coordinator.client.metrics
+        if self._sensor_key == "api_requests":
+            return api.requests
+        if self._sensor_key == "api_latency_p95":
+            slowest = api.slowest()
+            return slowest[1] if slowest else None
+        if self._sensor_key == "refresh_duration":
+            return self.coordinator.metrics.last_phase("critical")
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        api = self.coordinator.client.metrics
+        endpoints = api.as_dict()
+        if self._sensor_key == "api_requests":
+            return {
+                "errors": api.errors,
+                "retries": api.retries,
+                "coalesced": api.coalesced,
+                # Breaker-ele sunt comune conturilor; starea lor afectează și acest cont
+                "open_circuits": self.coordinator.transport.breakers.open_endpoints(),
+                "token_logins": self.coordinator.auth.stats["logins"],
+                "token_refreshes": self.coordinator.auth.stats["refreshes"],
+                "endpoints": {
+                    name: {k: m[k] for k in ("requests", "errors", "retries")}
+                    for name, m in endpoints.items()
+                },
+            }
+        if self._sensor_key == "api_latency_p95":
+            slowest = api.slowest()
+            return {
+                "slowest_endpoint": slowest[0] if slowest else None,
+                "endpoints": {
+                    name: {
+                        k: m[k] for k in ("p50_ms", "p95_ms", "p99_ms", "bytes_total", "bytes_max")
+                    }
+                    for name, m in endpoints.items()
+                },
+            }
+        if self._sensor_key == "refresh_duration":
+            metrics = self.coordinator.metrics.as_dict()
+            return {
+                "enrichment_sec": self.coordinator.metrics.last_phase("enrichment"),
+                "phases": metrics["phases"],
+                "places_sec": metrics["places_last_sec"],
+            }
+        return {}
+
+
+class EngieLastUpdateSensor(EngieBaseEntity):
+    """Momentul ultimului refresh reușit (vechimea datelor venite din snapshot)."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_name = "Engie – Ultima actualizare"
+    _attr_icon = "mdi:update"
+
+    def __init__(self, coordinator: EngieDataCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{entry.entry_id}_last_update"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return self.account_device_info
+
+    @property
+    def native_value(self) -> datetime | None:
+        data = self.coordinator.data
+        if data is None or not data.last_update:
+            return None
+        try:
+            return datetime.fromisoformat(data.last_update)
+        except (TypeError, ValueError):
+            return None
+
+
 # ---------------------------------------------------------------------------
 # Place entity base
 # ---------------------------------------------------------------------------
@@ -326,14 +371,13 @@ class EngiePlaceEntity(EngieBaseEntity):
         self,
         coordinator: EngieDataCoordinator,
         entry: ConfigEntry,
-        place: Mapping[str, Any],
+        place: PlaceSnapshot,
         index: int,
     ) -> None:
         super().__init__(coordinator, entry)
-        self._place = dict(place)
         self._index = index
-        self._poc = _place_poc(place, index)
-        self._address = _place_address(place, index)
+        self._poc = place.poc_number or str(index)
+        self._address = place.label or f"Loc consum {index + 1}"
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -346,10 +390,11 @@ class EngiePlaceEntity(EngieBaseEntity):
             via_device=self._account_identifier,
         )
 
-    def _place_data(self) -> dict[str, Any]:
+    def _place_data(self) -> PlaceSnapshot:
         """Return the coordinator data slice for this place."""
-        places_data = (self.coordinator.data or {}).get("places_data") or {}
-        return places_data.get(self._poc) or {}
+        data = self.coordinator.data
+        place = data.places.get(self._poc) if data else None
+        return place or PlaceSnapshot(poc_number=None)
 
     def _base_attrs(self) -> dict[str, Any]:
         """Minimal common attributes — only clean, relevant fields."""
@@ -358,22 +403,19 @@ class EngiePlaceEntity(EngieBaseEntity):
             "attribution": ATTRIBUTION,
             "poc_number": self._poc,
         }
-        address = pd.get("address") or self._address
+        address = pd.address or self._address
         if address:
             attrs["adresa"] = address
-        contract = (
-            pd.get("contract_account_number")
-            or pd.get("contract_account")
-            or _place_contract(self._place)
-        )
+        contract = pd.contract_account_number or pd.contract_account
         if contract:
             attrs["cont_contract"] = contract
-        division = pd.get("division") or _place_division(self._place)
-        if division:
-            attrs["tip_energie"] = division
-        pa = pd.get("pa")
-        if pa:
-            attrs["pa"] = pa
+        if pd.division:
+            attrs["tip_energie"] = pd.division
+        if pd.pa:
+            attrs["pa"] = pd.pa
+        # Clasele de date care nu s-au putut reîmprospăta la timp (valori din cache)
+        if pd.stale:
+            attrs["stale"] = list(pd.stale)
         return attrs
 
 
@@ -387,7 +429,7 @@ class EngiePlaceSensor(EngiePlaceEntity):
         self,
         coordinator: EngieDataCoordinator,
         entry: ConfigEntry,
-        place: Mapping[str, Any],
+        place: PlaceSnapshot,
         index: int,
         sensor_key: str,
         name: str,
@@ -403,16 +445,11 @@ class EngiePlaceSensor(EngiePlaceEntity):
     def native_value(self) -> Any:
         pd = self._place_data()
         if self._sensor_key == "summary":
-            return pd.get("poc_number") or _place_division(self._place) or self._poc
+            return pd.poc_number or pd.division or self._poc
         if self._sensor_key == "address":
-            return pd.get("address") or self._address
+            return pd.address or self._address
         if self._sensor_key == "contract":
-            return (
-                pd.get("contract_account_number")
-                or pd.get("contract_account")
-                or _place_contract(self._place)
-                or "—"
-            )
+            return pd.contract_account_number or pd.contract_account or "—"
         return None
 
     @property
@@ -422,38 +459,19 @@ class EngiePlaceSensor(EngiePlaceEntity):
 
         if self._sensor_key == "summary":
             # Include contract details
-            ca_num = pd.get("contract_account_number") or pd.get("contract_account")
-            inst_num = pd.get("installation_number")
+            ca_num = pd.contract_account_number or pd.contract_account
             if ca_num:
                 attrs["numar_contract"] = ca_num
-            if inst_num:
-                attrs["numar_instalatie"] = inst_num
+            if pd.installation_number:
+                attrs["numar_instalatie"] = pd.installation_number
 
         elif self._sensor_key == "address":
-            # Include structured address fields from raw place
-            raw_addr = self._place.get("address") or {}
-            if isinstance(raw_addr, dict):
-                for field in (
-                    "street",
-                    "number",
-                    "floor",
-                    "apartment",
-                    "city",
-                    "district",
-                    "postcode",
-                ):
-                    val = raw_addr.get(field)
-                    if val:
-                        attrs[field] = val
+            # Structured address fields from the places list
+            attrs.update(pd.address_fields)
 
         elif self._sensor_key == "contract":
-            # Include greenbill / email info if available
-            raw_contract = self._place.get("contract_account") or {}
-            if isinstance(raw_contract, dict):
-                for field in ("greenbill_email", "has_greenbill", "greenbill_status"):
-                    val = raw_contract.get(field)
-                    if val is not None:
-                        attrs[field] = val
+            # Greenbill / email info if available
+            attrs.update(pd.contract_fields)
 
         return attrs
 
@@ -468,7 +486,7 @@ class EngiePlaceDataSensor(EngiePlaceEntity):
         self,
         coordinator: EngieDataCoordinator,
         entry: ConfigEntry,
-        place: Mapping[str, Any],
+        place: PlaceSnapshot,
         index: int,
         sensor_key: str,
         name: str,
@@ -485,22 +503,21 @@ class EngiePlaceDataSensor(EngiePlaceEntity):
         pd = self._place_data()
 
         if self._sensor_key == "current_index_window":
-            info = pd.get("index_info") or {}
-            return _in_reading_window(info)
+            return _in_reading_window(pd.reading)
 
         if self._sensor_key == "unpaid_total":
-            unpaid = pd.get("unpaid_total")
+            unpaid = pd.unpaid_total
             try:
                 return float(unpaid) if unpaid is not None else 0.0
             except Exception:
                 return unpaid
 
         if self._sensor_key == "invoice_archive_count":
-            # Use consumption_count (number of invoices fetched)
-            return pd.get("consumption_count") or 0
+            # Number of payments in the last year
+            return len(pd.recent_consumption())
 
         if self._sensor_key == "index_history_last":
-            return pd.get("index_history_last")
+            return pd.last_index
 
         return None
 
@@ -510,49 +527,42 @@ class EngiePlaceDataSensor(EngiePlaceEntity):
         attrs = self._base_attrs()
 
         if self._sensor_key == "current_index_window":
-            info = pd.get("index_info") or {}
+            info = pd.reading
             # Clean, relevant fields only
-            if info.get("autocit") is not None:
-                attrs["autocit"] = info["autocit"]
-            if info.get("permite_index") is not None:
-                attrs["permite_index"] = info["permite_index"]
-            if info.get("last_index") is not None:
-                attrs["ultimul_index"] = info["last_index"]
-            if info.get("start_date"):
-                attrs["start_citire"] = info["start_date"]
-            if info.get("end_date"):
-                attrs["end_citire"] = info["end_date"]
+            if info is not None:
+                if info.autocit is not None:
+                    attrs["autocit"] = info.autocit
+                if info.permite_index is not None:
+                    attrs["permite_index"] = info.permite_index
+                if info.last_index is not None:
+                    attrs["ultimul_index"] = info.last_index
+                if info.start_date:
+                    attrs["start_citire"] = info.start_date
+                if info.end_date:
+                    attrs["end_citire"] = info.end_date
 
         elif self._sensor_key == "unpaid_total":
-            items = pd.get("unpaid_items") or []
-            if items:
-                # Simplified: only invoice_number, due_date, unpaid per item
-                attrs["facturi_restante"] = [
-                    {
-                        "numar_factura": it.get("invoice_number"),
-                        "scadenta": it.get("due_date"),
-                        "restant": it.get("unpaid"),
-                        "total": it.get("total"),
-                    }
-                    for it in items
-                ]
-            else:
-                attrs["facturi_restante"] = []
+            # Simplified: only invoice_number, due_date, unpaid per item
+            attrs["facturi_restante"] = [
+                {
+                    "numar_factura": it.invoice_number,
+                    "scadenta": it.due_date,
+                    "restant": it.unpaid,
+                    "total": it.total,
+                }
+                for it in pd.unpaid_items
+            ]
 
         elif self._sensor_key == "invoice_archive_count":
-            # Clean "luna: suma" dict — newest first
-            by_month = pd.get("consumption_by_month") or {}
-            attrs.update(by_month)
-            total = pd.get("consumption_total")
-            if total is not None:
-                attrs["total_suma_achitata"] = f"{total:.2f} lei".replace(".", ",")
-            platite = pd.get("consumption_count")
-            if platite is not None:
-                attrs["plati_efectuate"] = platite
+            # Clean "luna: suma" dict for the last year — newest first
+            payments = pd.recent_consumption()
+            attrs.update(consumption_by_month(payments))
+            if pd.has(tiers.CONSUMPTION):
+                attrs["total_suma_achitata"] = format_lei(payments.total())
+                attrs["plati_efectuate"] = len(payments)
 
         elif self._sensor_key == "index_history_last":
             # Clean "luna an: index" dict — newest first
-            by_month = pd.get("index_history_by_month") or {}
-            attrs.update(by_month)
+            attrs.update(index_by_month(pd.recent_readings()))
 
         return attrs
@@ -0,0 +1,87 @@
+"""Serii de timp compacte pentru citirile de index și plățile unui loc de consum.
+
+Zilele (număr de zile de la 1970-01-01) și valorile stau în două `array`-uri
+paralele, sortate după zi: fără un obiect Python pe intrare, cu interogări pe
+interval prin căutare binară și grupare pe luni calculată la cerere.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import date
+from typing import Any
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def epoch_day(day: date) -> int:
+    return day.toordinal() - _EPOCH
+
+
+def from_epoch_day(day: int) -> date:
+    return date.fromordinal(day + _EPOCH)
+
+
+class TimeSeries:
+    """Valori pe zile, sortate cronologic; mai multe valori în aceeași zi sunt permise."""
+
+    __slots__ = ("_days", "_values")
+
+    def __init__(self, days: Iterable[int] = (), values: Iterable[float] = ()) -> None:
+        # Apelantul garantează ordinea; `from_points` sortează
+        self._days = array("i", days)
+        self._values = array("d", values)
+        if len(self._days) != len(self._values):
+            raise ValueError("days and values differ in length")
+
+    @classmethod
+    def from_points(cls, points: Iterable[tuple[date, float]]) -> TimeSeries:
+        pairs = sorted((epoch_day(d), float(v)) for d, v in points)
+        return cls((d for d, _ in pairs), (v for _, v in pairs))
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def __iter__(self) -> Iterator[tuple[date, float]]:
+        for d, v in zip(self._days, self._values, strict=True):
+            yield from_epoch_day(d), v
+
+    def last(self) -> tuple[date, float] | None:
+        if not self._days:
+            return None
+        return from_epoch_day(self._days[-1]), self._values[-1]
+
+    def total(self) -> float:
+        return sum(self._values)
+
+    def between(self, start: date | None = None, end: date | None = None) -> TimeSeries:
+        """Intrările din intervalul închis `[start, end]`."""
+        lo = 0 if start is None else bisect_left(self._days, epoch_day(start))
+        hi = len(self._days) if end is None else bisect_right(self._days, epoch_day(end))
+        return TimeSeries(self._days[lo:hi], self._values[lo:hi])
+
+    def by_month(self, how: str = "sum") -> list[tuple[int, int, float]]:
+        """`(an, lună, valoare)` pe luni, cea mai recentă prima.
+
+        `how="sum"` adună valorile lunii, `how="last"` păstrează ultima valoare.
+        """
+        months: dict[tuple[int, int], float] = {}
+        for d, v in zip(self._days, self._values, strict=True):
+            day = from_epoch_day(d)
+            key = (day.year, day.month)
+            months[key] = months.get(key, 0.0) + v if how == "sum" else v
+        return [(y, m, v) for (y, m), v in reversed(months.items())]
+
+    def as_dict(self) -> dict[str, list]:
+        return {"days": self._days.tolist(), "values": self._values.tolist()}
+
+    @classmethod
+    def from_dict(cls, raw: Any) -> TimeSeries:
+        if not isinstance(raw, dict):
+            return cls()
+        return cls.from_points(
+            (from_epoch_day(int(d)), v)
+            for d, v in zip(raw.get("days") or (), raw.get("values") or (), strict=False)
+        )
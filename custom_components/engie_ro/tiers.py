@@ -0,0 +1,102 @@
+"""Reîmprospătare pe clase de date (tiers).
+
+Fiecare clasă de date (profil/locuri, adrese, sold neachitat, fereastra de
+citire, istoricele) are propriul TTL. Coordinatorul întreabă ce clase sunt
+scadente pentru un loc de consum și păstrează valorile din cache pentru rest.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable
+
+from .const import (
+    TIER_ACCOUNT_SEC,
+    TIER_DIVISIONS_SEC,
+    TIER_HISTORY_SEC,
+    TIER_INDEX_WINDOW_SEC,
+    TIER_SLACK_SEC,
+    UPDATE_INTERVAL_SEC,
+)
+
+ACCOUNT = "account"
+
+DIVISIONS = "divisions"
+INDEX_WINDOW = "index_window"
+UNPAID = "unpaid"
+INVOICES_HISTORY = "invoices_history"
+CONSUMPTION = "consumption"
+INDEX_HISTORY = "index_history"
+
+PLACE_SLICES: tuple[str, ...] = (
+    DIVISIONS,
+    INDEX_WINDOW,
+    UNPAID,
+    INVOICES_HISTORY,
+    CONSUMPTION,
+    INDEX_HISTORY,
+)
+HISTORY_SLICES: tuple[str, ...] = (INVOICES_HISTORY, CONSUMPTION, INDEX_HISTORY)
+
+# Faza critică (publicată imediat) și faza de îmbogățire (în fundal)
+CRITICAL_SLICES: tuple[str, ...] = (UNPAID, INDEX_WINDOW)
+ENRICHMENT_SLICES: tuple[str, ...] = (DIVISIONS, *HISTORY_SLICES)
+
+DEFAULT_TTLS: dict[str, float] = {
+    ACCOUNT: TIER_ACCOUNT_SEC,
+    DIVISIONS: TIER_DIVISIONS_SEC,
+    INDEX_WINDOW: TIER_INDEX_WINDOW_SEC,
+    UNPAID: UPDATE_INTERVAL_SEC,
+    INVOICES_HISTORY: TIER_HISTORY_SEC,
+    CONSUMPTION: TIER_HISTORY_SEC,
+    INDEX_HISTORY: TIER_HISTORY_SEC,
+}
+
+
+class RefreshTiers:
+    """Ține minte când a fost adusă ultima oară fiecare clasă de date."""
+
+    def __init__(self, ttls: dict[str, float] | None = None, slack: float = TIER_SLACK_SEC):
+        self._ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        # Toleranță ca un TTL egal cu un multiplu al intervalului să nu alunece un ciclu
+        self._slack = slack
+        self._fetched_at: dict[str, float] = {}
+
+    @staticmethod
+    def _key(data_class: str, poc: str | None) -> str:
+        return f"{poc}:{data_class}" if poc else data_class
+
+    def due(self, data_class: str, poc: str | None = None, now: float | None = None) -> bool:
+        fetched = self._fetched_at.get(self._key(data_class, poc))
+        if fetched is None:
+            return True
+        now = time.time() if now is None else now
+        return now >= fetched + self._ttls.get(data_class, 0) - self._slack
+
+    def due_slices(self, poc: str, now: float | None = None) -> set[str]:
+        now = time.time() if now is None else now
+        return {s for s in PLACE_SLICES if self.due(s, poc, now)}
+
+    def mark(self, data_class: str, poc: str | None = None, now: float | None = None) -> None:
+        self._fetched_at[self._key(data_class, poc)] = time.time() if now is None else now
+
+    def invalidate(self, poc: str, data_classes: Iterable[str]) -> None:
+        for data_class in data_classes:
+            self._fetched_at.pop(self._key(data_class, poc), None)
+
+    def as_dict(self) -> dict[str, float]:
+        return dict(self._fetched_at)
+
+    def restore(self, fetched_at: dict[str, float]) -> None:
+        self._fetched_at = {
+            str(k): float(v) for k, v in fetched_at.items() if isinstance(v, int | float)
+        }
+
+    def retain_places(self, pocs: Iterable[str]) -> None:
+        """Uită locurile de consum care nu mai există în cont."""
+        keep = set(pocs)
+        self._fetched_at = {
+            k: v
+            for k, v in self._fetched_at.items()
+            if ":" not in k or k.rpartition(":")[0] in keep
+        }
@@ -0,0 +1,75 @@
+"""Token-urile tuturor intrărilor Engie România, într-un singur fișier `.storage`.
+
+Fiecare intrare își păstrează bundle-ul (token, refresh token, expirări) sub
+`entry_id`. Fișierul este citit o dată, iar scrierile sunt grupate
+(`async_delay_save`), astfel încât un login nu mai face I/O sincron în event
+loop și mai multe conturi care se autentifică apropiat produc o singură scriere.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_TOKENS, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_STORAGE_VERSION = 1
+_STORAGE_KEY = f"{DOMAIN}.tokens"
+_SAVE_DELAY_SEC = 10
+
+
+class EngieTokenStore:
+    """Bundle-urile de token pe intrări, încărcate la prima utilizare."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        # Conține credențiale: fișier privat
+        self._store: Store = Store(hass, _STORAGE_VERSION, _STORAGE_KEY, private=True)
+        self._bundles: dict[str, dict[str, Any]] | None = None
+        self._lock = asyncio.Lock()
+
+    async def _async_bundles(self) -> dict[str, dict[str, Any]]:
+        if self._bundles is None:
+            async with self._lock:
+                if self._bundles is None:
+                    try:
+                        stored = await self._store.async_load()
+                    except Exception as e:
+                        _LOGGER.debug("Engie: nu pot citi token-urile salvate: %s", e)
+                        stored = None
+                    tokens = stored.get("tokens") if isinstance(stored, dict) else None
+                    self._bundles = dict(tokens) if isinstance(tokens, dict) else {}
+        return self._bundles
+
+    async def async_get(self, key: str) -> dict[str, Any] | None:
+        bundle = (await self._async_bundles()).get(key)
+        return dict(bundle) if isinstance(bundle, dict) else None
+
+    async def async_set(self, key: str, bundle: dict[str, Any]) -> None:
+        (await self._async_bundles())[key] = dict(bundle)
+        self._store.async_delay_save(self._data, _SAVE_DELAY_SEC)
+
+    async def async_remove(self, key: str) -> None:
+        if (await self._async_bundles()).pop(key, None) is not None:
+            self._store.async_delay_save(self._data, _SAVE_DELAY_SEC)
+
+    async def async_flush(self) -> None:
+        """Scrie imediat bundle-urile (înainte de a renunța la altă copie a lor)."""
+        await self._store.async_save(self._data())
+
+    def _data(self) -> dict[str, Any]:
+        return {"tokens": self._bundles or {}}
+
+
+def async_get_token_store(hass: HomeAssistant) -> EngieTokenStore:
+    # Rămâne cât rulează HA: o instanță nouă ar putea citi fișierul înaintea
+    # unei scrieri amânate a celei vechi
+    store: EngieTokenStore | None = hass.data.get(DATA_TOKENS)
+    if store is None:
+        store = hass.data[DATA_TOKENS] = EngieTokenStore(hass)
+    return store
@@ -0,0 +1,188 @@
+"""Transport HTTP comun pentru toate intrările Engie România.
+
+Un singur `aiohttp.ClientSession` (cu connector partajat) este deținut la
+nivel de integrare și injectat în fiecare `EngieClient`, astfel încât
+conexiunile keep-alive, cache-ul DNS și contextul TLS sunt reutilizate între
+conturi și între cererile unui refresh.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import ssl
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util.ssl import get_default_context
+
+from .api import CircuitBreakers, FormVariantCache, SingleFlight, TokenBucket
+from .const import (
+    DATA_TRANSPORT,
+    DOMAIN,
+    TRANSPORT_DNS_TTL_SEC,
+    TRANSPORT_KEEPALIVE_SEC,
+    TRANSPORT_LIMIT,
+    TRANSPORT_LIMIT_PER_HOST,
+)
+from .metrics import ApiMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+_STORAGE_VERSION = 1
+_STORAGE_KEY_VARIANTS = f"{DOMAIN}.form_variants"
+_SAVE_DELAY_SEC = 10
+
+
+class EngieTransport:
+    """Connector + sesiune partajate, cu contoare de reutilizare a conexiunilor."""
+
+    def __init__(
+        self,
+        ssl_context: ssl.SSLContext | None = None,
+        *,
+        limit: int = TRANSPORT_LIMIT,
+        limit_per_host: int = TRANSPORT_LIMIT_PER_HOST,
+        keepalive_timeout: float = TRANSPORT_KEEPALIVE_SEC,
+        dns_ttl: int = TRANSPORT_DNS_TTL_SEC,
+    ) -> None:
+        self._ssl_context = ssl_context
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_ttl = dns_ttl
+        self._session: aiohttp.ClientSession | None = None
+        self.form_variants = FormVariantCache()
+        # Breaker-ele sunt pe endpoint, deci comune tuturor conturilor
+        self.breakers = CircuitBreakers()
+        # Cereri identice simultane ale aceleiași intrări (de ex. un refresh manual
+        # peste cel programat) pleacă o dată; cheia include token-ul intrării
+        self.single_flight = SingleFlight()
+        # Toate intrările trec prin același bucket, ca rafalele lor să nu se adune
+        self.rate_limiter = TokenBucket()
+        self._rate_limits: dict[str, tuple[float, int]] = {}
+        self.metrics = ApiMetrics()
+        self.users = 0
+        self._load_task: asyncio.Task | None = None
+        self.stats: dict[str, int] = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Sesiunea partajată; se creează la prima utilizare, în event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self._dns_ttl,
+                enable_cleanup_closed=True,
+                ssl=self._ssl_context if self._ssl_context is not None else True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, trace_configs=[self._trace_config()]
+            )
+        return self._session
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        def _counter(key: str):
+            async def _inc(_session: Any, _ctx: SimpleNamespace, _params: Any) -> None:
+                self.stats[key] += 1
+
+            return _inc
+
+        trace.on_request_start.append(_counter("requests"))
+        trace.on_connection_create_end.append(_counter("connections_created"))
+        trace.on_connection_reuseconn.append(_counter("connections_reused"))
+        trace.on_dns_cache_hit.append(_counter("dns_cache_hits"))
+        trace.on_dns_cache_miss.append(_counter("dns_cache_misses"))
+        return trace
+
+    def set_rate_limit(self, entry_id: str, rate: float, burst: int) -> None:
+        """Înregistrează limita cerută de o intrare; se aplică cea mai strictă."""
+        self._rate_limits[entry_id] = (rate, burst)
+        self._apply_rate_limit()
+
+    def clear_rate_limit(self, entry_id: str) -> None:
+        if self._rate_limits.pop(entry_id, None) is not None:
+            self._apply_rate_limit()
+
+    def _apply_rate_limit(self) -> None:
+        if not self._rate_limits:
+            return
+        self.rate_limiter.configure(
+            min(rate for rate, _ in self._rate_limits.values()),
+            min(burst for _, burst in self._rate_limits.values()),
+        )
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fracțiunea cererilor servite pe o conexiune deja deschisă."""
+        created = self.stats["connections_created"]
+        reused = self.stats["connections_reused"]
+        total = created + reused
+        return reused / total if total else 0.0
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+async def _async_load_shared_state(hass: HomeAssistant, transport: EngieTransport) -> None:
+    """Încarcă variantele de formular învățate și le salvează (debounced) la schimbare."""
+    store: Store = Store(hass, _STORAGE_VERSION, _STORAGE_KEY_VARIANTS)
+    try:
+        stored = await store.async_load() or {}
+    except Exception as e:
+        _LOGGER.debug("Engie: nu pot citi variantele de formular salvate: %s", e)
+        stored = {}
+    variants = stored.get("variants") if isinstance(stored, dict) else None
+    expires = stored.get("expires") if isinstance(stored, dict) else None
+    transport.form_variants = FormVariantCache(
+        variants if isinstance(variants, dict) else None,
+        expires if isinstance(expires, dict) else None,
+    )
+    transport.form_variants.on_change = lambda: store.async_delay_save(
+        lambda: {
+            "variants": transport.form_variants.as_dict(),
+            "expires": transport.form_variants.expires_as_dict(),
+        },
+        _SAVE_DELAY_SEC,
+    )
+
+
+async def async_acquire_transport(hass: HomeAssistant) -> EngieTransport:
+    """Returnează transportul integrării, creându-l la prima intrare încărcată."""
+    transport: EngieTransport | None = hass.data.get(DATA_TRANSPORT)
+    if transport is None:
+        transport = EngieTransport(ssl_context=get_default_context())
+        hass.data[DATA_TRANSPORT] = transport
+        transport._load_task = hass.async_create_task(_async_load_shared_state(hass, transport))
+    transport.users += 1
+    if transport._load_task is not None:
+        await asyncio.shield(transport._load_task)
+    return transport
+
+
+async def async_release_transport(hass: HomeAssistant) -> None:
+    """Eliberează transportul; îl închide când nu mai există intrări care îl folosesc."""
+    transport: EngieTransport | None = hass.data.get(DATA_TRANSPORT)
+    if transport is None:
+        return
+    transport.users -= 1
+    if transport.users <= 0:
+        hass.data.pop(DATA_TRANSPORT, None)
+        _LOGGER.debug("Engie: închid transportul HTTP partajat (%s)", transport.stats)
+        await transport.close()
@@ -6,6 +6,7 @@ import aiohttp
 from homeassistant.components.update import UpdateEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -64,21 +65,22 @@ class EngieUpdateEntity(UpdateEntity):
         # Interoghează GitHub pentru ultima versiune
         try:
             timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(
-                    API_URL, headers={"Accept": "application/vnd.github+json"}
-                ) as resp:
-                    if resp.status != 200:
-                        _LOGGER.debug("GitHub latest release returned %s", resp.status)
-                        return
-                    data = await resp.json()
-                    tag = data.get("tag_name") or data.get("name")
-                    body = data.get("body")
-                    html_url = data.get("html_url") or HTML_RELEASE
-                    if tag:
-                        self._latest_version = str(tag).lstrip("v")
-                    self._attr_release_summary = body
-                    self._attr_release_url = html_url
+            # Sesiunea comună a HA: traficul GitHub nu trece prin transportul Engie
+            session = async_get_clientsession(self.hass)
+            async with session.get(
+                API_URL, headers={"Accept": "application/vnd.github+json"}, timeout=timeout
+            ) as resp:
+                if resp.status != 200:
+                    _LOGGER.debug("GitHub latest release returned %s", resp.status)
+                    return
+                data = await resp.json()
+                tag = data.get("tag_name") or data.get("name")
+                body = data.get("body")
+                html_url = data.get("html_url") or HTML_RELEASE
+                if tag:
+                    self._latest_version = str(tag).lstrip("v")
+                self._attr_release_summary = body
+                self._attr_release_url = html_url
         except TimeoutError:
             _LOGGER.debug("Timeout checking GitHub releases")
         except Exception as exc:
@@ -0,0 +1,380 @@
+"""Benchmark-uri pentru parsarea din coordinator, pe payload-uri sintetice.
+
+Măsoară timpul (minimul a `--repeat` eșantioane, fiecare o buclă calibrată ca
+în `timeit`) și memoria maximă alocată (tracemalloc, într-o rulare separată) pentru:
+
+- `_extract_places_from_raw` pe 1 → 500 de locuri;
+- parserele unui loc (sold neachitat, facturi, consum, istoric index) pe 1 → 10 ani;
+- `_fetch_place_data` cu un client în memorie;
+- refresh-ul complet (`_async_update_data` + faza de îmbogățire) pe 1 → 500 de locuri.
+
+Payload-urile vin din `SyntheticAccount` (engie_simulator.py), fără rețea.
+Rezultatele se compară cu un baseline JSON; un caz mai lent decât
+`--tolerance` (și cu cel puțin `--min-ms`) sau cu memoria maximă peste
+`--mem-tolerance` față de baseline face ca scriptul să iasă cu cod 1. Cazurile
+marcate sunt confirmate prin până la `--confirm-runs` rulări suplimentare ale
+suitei, păstrând pentru fiecare caz minimul: o singură rulare afectată de
+încărcarea mașinii nu pică verificarea.
+
+    python tools/engie_benchmark.py                      # compară cu baseline-ul
+    python tools/engie_benchmark.py --write-baseline     # înregistrează baseline-ul
+    python tools/engie_benchmark.py --quick              # doar dimensiunile mici
+
+Baseline-ul este valabil doar pe mașina (și versiunea de Python) care l-a
+înregistrat: pe altă mașină timpii nu sunt comparabili, deci reînregistrați-l
+local înainte de a compara. Scriptul avertizează când metadatele diferă.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tools"))
+
+from engie_simulator import SyntheticAccount  # noqa: E402
+
+from custom_components.engie_ro import coordinator as C  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / "tools" / "benchmark_baseline.json"
+
+PLACE_COUNTS = (1, 10, 50, 100, 500)
+YEARS = (1, 3, 5, 10)
+QUICK_PLACE_COUNTS = (1, 10, 50)
+QUICK_YEARS = (1, 3)
+# Istoricul se termină la începutul lunii curente, ca ferestrele de date ale
+# coordinatorului (relative la azi) să-l cuprindă; în cursul unei luni
+# payload-urile sunt identice de la o rulare la alta
+TODAY = date.today().replace(day=1)
+_MIN_SAMPLE_SEC = 0.1
+
+
+class SyntheticClient:
+    """Înlocuitor în memorie pentru `EngieClient`, servit de un `SyntheticAccount`."""
+
+    def __init__(self, account: SyntheticAccount) -> None:
+        self.account = account
+        self.token = "bench"
+
+    async def get_user(self) -> Any:
+        return self.account.user_payload()
+
+    async def get_places(self) -> Any:
+        return self.account.places_payload()
+
+    async def get_divisions(self, poc_number: str, pa: str | None = None) -> Any:
+        return self.account.divisions_payload(poc_number)
+
+    async def get_index_window(self, poc_number: str, *args: Any, **kwargs: Any) -> Any:
+        return self.account.index_window_payload(poc_number)
+
+    async def get_invoices_details(self, contract_account: str) -> Any:
+        return self.account.invoices_details_payload([contract_account])
+
+    async def get_invoices_details_batch(self, contract_accounts: list[str]) -> Any:
+        return self.account.invoices_details_payload(contract_accounts)
+
+    def invoices_batch_succeeded(self) -> None:
+        return None
+
+    def invoices_batch_failed(self) -> None:
+        return None
+
+    async def get_invoices_history(
+        self, poc_number: str, start_date: str, end_date: str, pa: str | None = None
+    ) -> Any:
+        return self.account.invoices_history_payload(poc_number, start_date, end_date)
+
+    async def get_consumption(
+        self, poc_number: str, start_date: str, end_date: str, pa: str | None = None
+    ) -> Any:
+        return self.account.consumption_payload(poc_number, start_date, end_date)
+
+    async def get_index_history_post(
+        self, autocit: str, poc_number: str, division: str, start_date: str
+    ) -> Any:
+        return self.account.index_history_payload(poc_number, start_date)
+
+    async def close(self) -> None:
+        return None
+
+
+class SyntheticAuth:
+    async def ensure_valid_token(self) -> str:
+        return "bench"
+
+    async def call_with_reauth(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        return await request()
+
+
+def _measure_sync(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    # Ca timeit: buclă calibrată la cel puțin _MIN_SAMPLE_SEC, minimul din `repeat` eșantioane
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= _MIN_SAMPLE_SEC:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time_ms": round(min(samples) * 1000, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+async def _measure_async(factory: Callable[[], Awaitable[Any]], repeat: int) -> dict[str, float]:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            await factory()
+        if time.perf_counter() - start >= _MIN_SAMPLE_SEC:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await factory()
+        samples.append((time.perf_counter() - start) / number)
+    tracemalloc.start()
+    await factory()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time_ms": round(min(samples) * 1000, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def bench_extract_places(counts: tuple[int, ...], repeat: int) -> dict[str, dict]:
+    results = {}
+    for n in counts:
+        raw = SyntheticAccount(places=n, years=1, today=TODAY).places_payload()
+        results[f"extract_places[places={n}]"] = _measure_sync(
+            lambda raw=raw: C._extract_places_from_raw(raw), repeat
+        )
+    return results
+
+
+def bench_place_parsers(years: tuple[int, ...], repeat: int) -> dict[str, dict]:
+    results = {}
+    for y in years:
+        account = SyntheticAccount(places=1, years=y, today=TODAY)
+        place = account.places[0]
+        poc = place["poc_number"]
+        details = account.invoices_details_payload([place["contract_account"]])
+        history = account.invoices_history_payload(poc)
+        consumption = account.consumption_payload(poc)
+        readings = account.index_history_payload(poc)
+        cases = {
+            "parse_unpaid": lambda d=details, p=poc: C._parse_unpaid(d, p),
+            "parse_invoices_history": lambda h=history, p=poc: C._parse_invoices_history(h, p),
+            "parse_consumption": lambda c=consumption: C._parse_consumption(c),
+            "parse_index_history": lambda r=readings: C._parse_index_history(r),
+        }
+        for name, fn in cases.items():
+            results[f"{name}[years={y}]"] = _measure_sync(fn, repeat)
+    return results
+
+
+async def bench_fetch_place(years: tuple[int, ...], repeat: int) -> dict[str, dict]:
+    results = {}
+    for y in years:
+        account = SyntheticAccount(places=1, years=y, today=TODAY)
+        client = SyntheticClient(account)
+        place = account.places[0]
+        results[f"fetch_place_data[years={y}]"] = await _measure_async(
+            lambda c=client, p=place: C._fetch_place_data(c, SyntheticAuth(), p), repeat
+        )
+    return results
+
+
+async def bench_full_refresh(counts: tuple[int, ...], repeat: int) -> dict[str, dict]:
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.engie_ro.transport import EngieTransport
+
+    results = {}
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        for n in counts:
+            account = SyntheticAccount(places=n, years=3, today=TODAY)
+
+            async def _refresh(account: SyntheticAccount = account, n: int = n) -> None:
+                # Coordinator nou la fiecare rulare: fără cache, fără istoric salvat
+                hass.data.pop(C.DATA_STORES, None)
+                entry = SimpleNamespace(
+                    entry_id=f"bench{n}",
+                    data={"username": "bench", "password": "bench", "max_concurrent_places": 16},
+                    options={},
+                    title="bench",
+                )
+                entry.async_create_background_task = lambda _h, coro, _n: asyncio.create_task(coro)
+                transport = EngieTransport()
+                coord = C.EngieDataCoordinator(hass, entry, transport)
+                coord.client = SyntheticClient(account)
+                coord.auth = SyntheticAuth()
+                coord.data = await coord._async_update_data()
+                await coord._enrich_task
+                await transport.close()
+
+            results[f"full_refresh[places={n},years=3]"] = await _measure_async(_refresh, repeat)
+        await hass.async_stop(force=True)
+    return results
+
+
+def run_suite(counts: tuple[int, ...], years: tuple[int, ...], repeat: int) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    results.update(bench_extract_places(counts, repeat))
+    results.update(bench_place_parsers(years, repeat))
+
+    async def _async_cases() -> None:
+        results.update(await bench_fetch_place(years, repeat))
+        results.update(await bench_full_refresh(counts, repeat))
+
+    asyncio.run(_async_cases())
+    return results
+
+
+def _merge_min(results: dict[str, dict], rerun: dict[str, dict]) -> None:
+    for name, current in rerun.items():
+        best = results.setdefault(name, current)
+        best["time_ms"] = min(best["time_ms"], current["time_ms"])
+        best["peak_kib"] = min(best["peak_kib"], current["peak_kib"])
+
+
+def _regressed(current: float, base: float, tolerance: float, min_delta: float) -> bool:
+    return current > base * (1 + tolerance) and current - base > min_delta
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerance: float,
+    min_ms: float,
+    mem_tolerance: float,
+    min_kib: float,
+    quiet: bool = False,
+) -> list[str]:
+    """Cazurile mai lente sau mai mari decât baseline-ul peste toleranțe (fracțiuni).
+
+    Timpul se compară cu `tolerance`, memoria maximă cu `mem_tolerance`.
+    Diferențele sub `min_ms` / `min_kib` sunt ignorate: la cazurile foarte mici
+    zgomotul depășește ușor orice toleranță relativă.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("time_ms"):
+            continue
+        ratio = current["time_ms"] / base["time_ms"]
+        marker = ""
+        if _regressed(current["time_ms"], base["time_ms"], tolerance, min_ms):
+            marker = "  <-- REGRESIE"
+            regressions.append(name)
+        line = f"{name:48s} {base['time_ms']:10.3f} -> {current['time_ms']:10.3f} ms  x{ratio:.2f}"
+        base_kib = base.get("peak_kib")
+        if base_kib:
+            mem_ratio = current["peak_kib"] / base_kib
+            line += f"  {base_kib:9.1f} -> {current['peak_kib']:9.1f} KiB  x{mem_ratio:.2f}"
+            if _regressed(current["peak_kib"], base_kib, mem_tolerance, min_kib):
+                marker += "  <-- REGRESIE MEMORIE"
+                regressions.append(f"{name} (memorie)")
+        if not quiet:
+            print(line + marker)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark-uri pentru parsarea Engie România")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="scrie rezultatele și în acest fișier")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--confirm-runs", type=int, default=2)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--min-ms", type=float, default=0.5)
+    parser.add_argument("--mem-tolerance", type=float, default=0.5)
+    parser.add_argument("--min-kib", type=float, default=16.0)
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+
+    counts = QUICK_PLACE_COUNTS if args.quick else PLACE_COUNTS
+    years = QUICK_YEARS if args.quick else YEARS
+    repeat = max(1, args.repeat)
+
+    meta = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+    results = run_suite(counts, years, repeat)
+    baseline_report = (
+        json.loads(args.baseline.read_text())
+        if args.baseline.exists() and not args.write_baseline
+        else None
+    )
+    limits = (args.tolerance, args.min_ms, args.mem_tolerance, args.min_kib)
+    if baseline_report is not None:
+        baseline = baseline_report.get("results", {})
+        for _ in range(max(0, args.confirm_runs)):
+            if not compare(results, baseline, *limits, quiet=True):
+                break
+            _merge_min(results, run_suite(counts, years, repeat))
+
+    report = {
+        "meta": {
+            **meta,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+    if args.write_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline scris în {args.baseline} ({len(results)} cazuri)")
+        return 0
+
+    if baseline_report is None:
+        for name, current in results.items():
+            print(f"{name:48s} {current['time_ms']:10.3f} ms  {current['peak_kib']:10.1f} KiB")
+        print(f"Nu există baseline în {args.baseline}; rulați cu --write-baseline")
+        return 0
+
+    recorded = baseline_report.get("meta", {})
+    if any(recorded.get(key) != value for key, value in meta.items()):
+        print(
+            f"Atenție: baseline-ul a fost înregistrat pe altă mașină ({recorded}); "
+            "timpii nu sunt comparabili, reînregistrați-l cu --write-baseline"
+        )
+    regressions = compare(results, baseline_report.get("results", {}), *limits)
+    if regressions:
+        print(f"{len(regressions)} regresii: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
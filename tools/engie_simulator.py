@@ -0,0 +1,442 @@
+"""Simulator local pentru gateway-ul Engie (gwss.engie.ro/myservices).
+
+Servește aceleași endpoint-uri pe care le folosește integrarea, cu date
+sintetice deterministe (N locuri de consum, M ani de istoric), și poate injecta
+latență, erori 5xx, 401 și 429, ca schimbările de performanță să poată fi
+măsurate reproductibil fără contul real.
+
+    python tools/engie_simulator.py --places 20 --years 3 --latency-ms 80 --error-rate 0.02
+
+Integrarea se îndreaptă spre simulator setând `base_url` la
+`http://127.0.0.1:8080/myservices` (utilizator/parolă: oricare nevide). Contoarele
+simulatorului sunt disponibile la `/_sim/stats`.
+
+Generatoarele de payload (`SyntheticAccount`) sunt folosite și de benchmark-uri.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+from aiohttp import web
+
+_DIVISIONS = ("gaz", "electricitate")
+_CITIES = ("București", "Cluj-Napoca", "Iași", "Timișoara", "Brașov", "Constanța")
+_STREETS = ("Str. Florilor", "Bd. Unirii", "Calea Victoriei", "Str. Lalelelor", "Aleea Teilor")
+
+
+@dataclass
+class SimulatorConfig:
+    places: int = 3
+    years: int = 3
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    unauthorized_rate: float = 0.0
+    throttle_rate: float = 0.0
+    rate_limit_rps: float = 0.0
+    retry_after_sec: float = 1.0
+    token_ttl_sec: int = 3600
+    seed: int = 1
+
+
+def _month_starts(years: int, today: date) -> list[date]:
+    """Prima zi a fiecărei luni din ultimii `years` ani, de la cea mai veche."""
+    first = today.replace(day=1)
+    months = []
+    for i in range(years * 12, 0, -1):
+        y, m = divmod(first.year * 12 + first.month - 1 - i, 12)
+        months.append(date(y, m + 1, 1))
+    return months
+
+
+def _in_range(day: str, start: str | None, end: str | None) -> bool:
+    return (not start or day >= start[:10]) and (not end or day <= end[:10])
+
+
+class SyntheticAccount:
+    """Contul sintetic: locuri de consum, facturi lunare, plăți și citiri de index."""
+
+    def __init__(
+        self, places: int = 3, years: int = 3, seed: int = 1, today: date | None = None
+    ) -> None:
+        self.today = today or date.today()
+        self.places: list[dict[str, Any]] = []
+        self.invoices: dict[str, list[dict[str, Any]]] = {}
+        self.readings: dict[str, list[tuple[str, int]]] = {}
+        months = _month_starts(years, self.today)
+        for i in range(places):
+            rng = random.Random(f"{seed}:{i}")
+            poc = f"{5000000000 + i}"
+            division = _DIVISIONS[i % len(_DIVISIONS)]
+            place = {
+                "poc_number": poc,
+                "contract_account": f"{2000000000 + i}",
+                "pa": f"{3000000000 + i}",
+                "division": division,
+                "installation_number": f"{4000000000 + i}",
+                "address": {
+                    "street": rng.choice(_STREETS),
+                    "number": str(rng.randint(1, 200)),
+                    "city": rng.choice(_CITIES),
+                },
+            }
+            self.places.append(place)
+            invoices = []
+            index = rng.randint(100, 5000)
+            readings = []
+            for n, month in enumerate(months):
+                invoiced_at = month.replace(day=15).isoformat()
+                amount = round(rng.uniform(40, 900), 2)
+                invoices.append(
+                    {
+                        "invoice_number": f"F{poc[-4:]}{n:04d}",
+                        "invoiced_at": invoiced_at,
+                        "division": division,
+                        "amount": amount,
+                        "consumption": rng.randint(20, 400),
+                        # Ultimele două facturi sunt încă neachitate
+                        "unpaid": amount if n >= len(months) - 2 else 0.0,
+                        "due_date": (month + timedelta(days=45)).isoformat(),
+                    }
+                )
+                index += rng.randint(20, 400)
+                readings.append((month.isoformat(), index))
+            self.invoices[poc] = invoices
+            self.readings[poc] = readings
+        self._by_poc = {p["poc_number"]: p for p in self.places}
+        self._by_ca = {p["contract_account"]: p for p in self.places}
+
+    # -- payload-uri, în forma răspunsurilor gateway-ului ---------------------
+
+    def user_payload(self) -> dict[str, Any]:
+        return {
+            "data": {"email": "simulator@example.com", "user_name": "Simulator", "phone": "0700"}
+        }
+
+    def places_payload(self) -> dict[str, Any]:
+        return {"data": [dict(p) for p in self.places]}
+
+    def divisions_payload(self, poc: str) -> dict[str, Any]:
+        place = self._by_poc.get(poc)
+        if place is None:
+            return {"data": []}
+        address = place["address"]
+        return {
+            "data": [
+                {
+                    "division": place["division"],
+                    "strada": address["street"],
+                    "numar": address["number"],
+                    "localitate": address["city"],
+                }
+            ]
+        }
+
+    def index_window_payload(self, poc: str) -> dict[str, Any]:
+        place = self._by_poc.get(poc)
+        if place is None:
+            return {"data": []}
+        start = self.today.replace(day=20)
+        end = start + timedelta(days=8)
+        return {
+            "data": [
+                {
+                    "installations": [
+                        {
+                            "installation_number": place["installation_number"],
+                            "last_index": self.readings[poc][-1][1] if self.readings[poc] else 0,
+                            "autocit": f"A{poc[-6:]}",
+                            "permite_index": True,
+                            "next_read_dates": {
+                                "startDate": start.strftime("%d-%m-%Y"),
+                                "endDate": end.strftime("%d-%m-%Y"),
+                            },
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def invoices_details_payload(self, contract_accounts: list[str]) -> dict[str, Any]:
+        accounts = []
+        for ca in contract_accounts:
+            place = self._by_ca.get(ca)
+            if place is None:
+                continue
+            accounts.append(
+                {
+                    "contract_account": ca,
+                    "invoices": [
+                        {
+                            "invoice_number": inv["invoice_number"],
+                            "unpaid": f"{inv['unpaid']:.2f}".replace(".", ","),
+                            "due_date": inv["due_date"],
+                            "total": f"{inv['amount']:.2f}",
+                        }
+                        for inv in self.invoices[place["poc_number"]]
+                        if inv["unpaid"] > 0
+                    ],
+                }
+            )
+        return {"data": {"invoices": accounts, "pending": []}}
+
+    def balance_payload(self, contract_account: str) -> dict[str, Any]:
+        place = self._by_ca.get(contract_account)
+        total = sum(i["unpaid"] for i in self.invoices[place["poc_number"]]) if place else 0.0
+        return {"data": {"total": round(total, 2)}}
+
+    def _monthly(self, poc: str, start: str | None, end: str | None, paid: bool) -> dict:
+        """Facturile din interval, grupate pe lună, de la cea mai recentă."""
+        months = []
+        for inv in reversed(self.invoices.get(poc, [])):
+            if not _in_range(inv["invoiced_at"], start, end):
+                continue
+            item: dict[str, Any] = {
+                "invoice_number": inv["invoice_number"],
+                "division": inv["division"],
+                "invoiced_at": inv["invoiced_at"],
+            }
+            if paid:
+                item["value"] = f"{inv['amount']:.2f}"
+            elif inv["division"] == "gaz":
+                item["consum_gaz"] = inv["consumption"]
+            else:
+                item["consum_elec"] = inv["consumption"]
+            months.append({"invoiced_at": inv["invoiced_at"][:7], "invoice_numbers": [item]})
+        return {"data": months}
+
+    def invoices_history_payload(
+        self, poc: str, start: str | None = None, end: str | None = None
+    ) -> dict[str, Any]:
+        return self._monthly(poc, start, end, paid=False)
+
+    def consumption_payload(
+        self, poc: str, start: str | None = None, end: str | None = None
+    ) -> dict[str, Any]:
+        return self._monthly(poc, start, end, paid=True)
+
+    def index_history_payload(self, poc: str, start: str | None = None) -> dict[str, Any]:
+        readings = [
+            {"data": d, "index": str(idx)}
+            for d, idx in reversed(self.readings.get(poc, []))
+            if _in_range(d, start, None)
+        ]
+        return {"data": {"istoric_citiri": readings}}
+
+
+class EngieSimulator:
+    """Aplicația aiohttp: rutele gateway-ului plus injecția de latență și erori."""
+
+    def __init__(
+        self, config: SimulatorConfig, account: SyntheticAccount | None = None, prefix: str = ""
+    ) -> None:
+        self.config = config
+        self.account = account or SyntheticAccount(config.places, config.years, config.seed)
+        self.prefix = prefix.rstrip("/")
+        self._rng = random.Random(config.seed)
+        self._issued = 0
+        self._bucket = (float(max(1.0, config.rate_limit_rps)), time.monotonic())
+        self.stats: Counter[str] = Counter()
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        p = self.prefix
+        app.router.add_post(f"{p}/v1/login", self._login)
+        app.router.add_post(f"{p}/v1/refresh_token", self._refresh)
+        app.router.add_get(f"{p}/v2/app_status", self._app_status)
+        app.router.add_get(f"{p}/v1/user/me", self._user)
+        app.router.add_get(f"{p}/v1/placesofconsumption", self._places)
+        app.router.add_get(f"{p}/v1/placesofconsumption/divisions/{{poc}}", self._divisions)
+        app.router.add_get(f"{p}/v1/index/consumption/{{poc}}", self._consumption)
+        app.router.add_post(f"{p}/v1/index/history", self._index_history)
+        app.router.add_get(f"{p}/v1/index/{{poc}}", self._index_window)
+        app.router.add_post(f"{p}/v1/widgets/ballance", self._balance)
+        app.router.add_post(f"{p}/v1/invoices/ballance-details", self._invoices_details)
+        app.router.add_get(f"{p}/v1/invoices/history-only/{{poc}}", self._invoices_history)
+        app.router.add_get("/_sim/stats", self._stats)
+        return app
+
+    # -- injecție ------------------------------------------------------------
+
+    def _throttled(self) -> bool:
+        rps = self.config.rate_limit_rps
+        if rps > 0:
+            tokens, updated = self._bucket
+            now = time.monotonic()
+            tokens = min(max(1.0, rps), tokens + (now - updated) * rps)
+            if tokens < 1:
+                self._bucket = (tokens, now)
+                return True
+            self._bucket = (tokens - 1, now)
+        return self._rng.random() < self.config.throttle_rate
+
+    def _authorized(self, request: web.Request) -> bool:
+        # Token-ul își poartă expirarea (`sim.<epoch>.<n>`), deci rămâne valid
+        # și după repornirea simulatorului, ca un token salvat de integrare
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        parts = token.split(".")
+        if len(parts) != 3 or parts[0] != "sim" or not parts[1].isdigit():
+            return False
+        if int(parts[1]) < time.time():
+            return False
+        return self._rng.random() >= self.config.unauthorized_rate
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.path.startswith("/_sim/"):
+            return await handler(request)
+        resource = request.match_info.route.resource
+        name = f"{request.method} {resource.canonical if resource else request.path}"
+        self.stats[name] += 1
+        cfg = self.config
+        delay = cfg.latency_ms + self._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self._throttled():
+            self.stats["injected_429"] += 1
+            return web.json_response(
+                {"error": "too many requests"},
+                status=429,
+                headers={"Retry-After": f"{cfg.retry_after_sec:g}"},
+            )
+        if self._rng.random() < cfg.error_rate:
+            self.stats["injected_5xx"] += 1
+            return web.json_response({"error": "simulated"}, status=self._rng.choice((500, 503)))
+        public = request.path.endswith(("/v1/login", "/v1/refresh_token"))
+        if not public and not self._authorized(request):
+            self.stats["rejected_401"] += 1
+            return web.json_response({"error": "unauthorized"}, status=401)
+        return await handler(request)
+
+    # -- rute ----------------------------------------------------------------
+
+    async def _login(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if not form.get("username") or not form.get("password"):
+            return web.json_response({"error": "invalid credentials"}, status=400)
+        return self._issue()
+
+    async def _refresh(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if not str(form.get("refresh_token") or "").startswith("sim-refresh-"):
+            return web.json_response({"error": "invalid refresh token"}, status=401)
+        return self._issue()
+
+    def _issue(self) -> web.Response:
+        self._issued += 1
+        now = time.time()
+        expires = int(now + self.config.token_ttl_sec)
+        token = f"sim.{expires}.{self._issued}"
+        return web.json_response(
+            {
+                "data": {
+                    "token": token,
+                    "refresh_token": f"sim-refresh-{self._issued}",
+                    "exp": expires,
+                    "refresh_token_expiration_date": int(now + 30 * 86400),
+                }
+            }
+        )
+
+    async def _app_status(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": {"status": "ok"}})
+
+    async def _user(self, request: web.Request) -> web.Response:
+        return web.json_response(self.account.user_payload())
+
+    async def _places(self, request: web.Request) -> web.Response:
+        return web.json_response(self.account.places_payload())
+
+    async def _divisions(self, request: web.Request) -> web.Response:
+        return web.json_response(self.account.divisions_payload(request.match_info["poc"]))
+
+    async def _index_window(self, request: web.Request) -> web.Response:
+        return web.json_response(self.account.index_window_payload(request.match_info["poc"]))
+
+    async def _consumption(self, request: web.Request) -> web.Response:
+        q = request.query
+        return web.json_response(
+            self.account.consumption_payload(
+                request.match_info["poc"], q.get("startDate"), q.get("endDate")
+            )
+        )
+
+    async def _invoices_history(self, request: web.Request) -> web.Response:
+        q = request.query
+        return web.json_response(
+            self.account.invoices_history_payload(
+                request.match_info["poc"], q.get("startDate"), q.get("endDate")
+            )
+        )
+
+    async def _index_history(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response(
+            self.account.index_history_payload(
+                str(body.get("poc_number") or ""), body.get("start_date")
+            )
+        )
+
+    async def _contract_accounts(self, request: web.Request) -> list[str]:
+        form = await request.post()
+        return [str(v) for v in form.getall("contract_account[]", [])] or [
+            str(v) for v in form.getall("contract_account", [])
+        ]
+
+    async def _balance(self, request: web.Request) -> web.Response:
+        accounts = await self._contract_accounts(request)
+        return web.json_response(self.account.balance_payload(accounts[0] if accounts else ""))
+
+    async def _invoices_details(self, request: web.Request) -> web.Response:
+        accounts = await self._contract_accounts(request)
+        return web.json_response(self.account.invoices_details_payload(accounts))
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--prefix", default="/myservices")
+    parser.add_argument("--places", type=int, default=3)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracțiune de 5xx")
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0, help="fracțiune de 401")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fracțiune de 429")
+    parser.add_argument("--rate-limit-rps", type=float, default=0.0, help="429 peste rata dată")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--token-ttl", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config = SimulatorConfig(
+        places=args.places,
+        years=args.years,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        throttle_rate=args.throttle_rate,
+        rate_limit_rps=args.rate_limit_rps,
+        retry_after_sec=args.retry_after,
+        token_ttl_sec=args.token_ttl,
+        seed=args.seed,
+    )
+    simulator = EngieSimulator(config, prefix=args.prefix)
+    web.run_app(simulator.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()